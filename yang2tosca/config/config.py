@@ -1,39 +1,77 @@
 """Support for reading TOSCA translator configuration file"""
 
+import functools
+import logging
+import os
+
 import yaml
 
+logger = logging.getLogger(__name__)
+
+# Use the libyaml-based loader if it is available
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
+
+# Location of the built-in config file
+try:
+    import importlib.resources
+    _DEFAULT_CONFIG_PATH = str(importlib.resources.files('yang2tosca').joinpath('config.yaml'))
+except AttributeError:
+    # importlib.resources.files() requires Python 3.9
+    import pkg_resources
+    _DEFAULT_CONFIG_PATH = pkg_resources.resource_filename('yang2tosca', 'config.yaml')
+
+# Parsed config files, keyed by (absolute path, mtime, size)
+_CONFIG_CACHE = dict()
+
 def read_tosca_config(config_file_name):
-    """Read the configuration file for the YANG to TOSCA translator
+    """Read the configuration file for the YANG to TOSCA translator.
+
+    Parsed configurations are cached and shared between callers, so
+    the returned data must not be modified.
     """
 
     if not config_file_name:
         # Use built-in config
-        import pkg_resources
-        config_file_name = pkg_resources.resource_filename('yang2tosca', 'config.yaml')
-
-    # Open config file
-    try:
-        print("Use config file '%s'" % (config_file_name))
-        config_file = open(config_file_name)
-    except Exception as e:
-        print("Unable to open '%s': %s" % (config_file_name, str(e)))
-        return None
+        return _load_builtin_config()
 
-    # Read data from the config file
+    # Return cached config if the file hasn't changed since we last
+    # read it
     try:
-        config_file_data = config_file.read()
-    except Exception as e:
-        print("Unable to read '%s': %s" % (config_file_name, str(e)))
-        return None
+        st = os.stat(config_file_name)
+        cache_key = (os.path.abspath(config_file_name), st.st_mtime_ns, st.st_size)
+    except OSError:
+        cache_key = None
+    if cache_key in _CONFIG_CACHE:
+        return _CONFIG_CACHE[cache_key]
 
-    # Return parsed file content as YAML.
-    try:
-        yaml_data = yaml.load(config_file_data, Loader=yaml.FullLoader)
-    except Exception as e:
-        print("Unable to parse '%s': %s" % (config_file_name, str(e)))
-        return None
+    yaml_data = _read_config_file(config_file_name)
 
     # All done
+    if cache_key and yaml_data is not None:
+        _CONFIG_CACHE[cache_key] = yaml_data
     return yaml_data
 
 
+@functools.lru_cache(maxsize=1)
+def _load_builtin_config():
+    """Read the built-in configuration file. The built-in config never
+    changes for an installed version, so it is only parsed once.
+    """
+    return _read_config_file(_DEFAULT_CONFIG_PATH)
+
+
+def _read_config_file(config_file_name):
+    """Parse the YAML content of a configuration file. Let the YAML
+    parser read directly from the file rather than reading the file
+    into memory first.
+    """
+    logger.info("Use config file '%s'", config_file_name)
+    try:
+        with open(config_file_name, 'rb') as config_file:
+            return yaml.load(config_file, Loader=_Loader)
+    except (OSError, yaml.YAMLError) as e:
+        logger.error("Unable to read '%s': %s", config_file_name, e)
+        return None
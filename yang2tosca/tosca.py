@@ -5,43 +5,157 @@ types
 
 import optparse
 import logging
+import io
+import sys
 
 from pyang import plugin
 from pyang import statements
-from pyang import types
-from pyang import error
-
-from datetime import datetime
 
 import re
 import textwrap
+import functools
+from collections import defaultdict
 
 import stringcase
 
 # Import config file support
 import yang2tosca.config.config as cfg
 
+logger = logging.getLogger(__name__)
+
 # TOSCA namespace for built-in IETF types
 IETF_NAMESPACE = 'org.ietf:1.0'
 IETF_NAMESPACE_PREFIX = 'inet'
 
+
+class IndentTable(dict):
+    """Indentation strings indexed by nesting depth. Emitters are passed
+    a depth rather than an indentation string, so each string is only
+    created once. Deeper levels are added on demand rather than failing
+    on unusually deeply nested modules.
+    """
+    def __missing__(self, depth):
+        indent = self[depth] = '  ' * depth
+        return indent
+
+
+# Indentation strings for each nesting depth in the TOSCA output
+INDENTS = IndentTable((depth, '  ' * depth) for depth in range(64))
+
+# YANG statements that result in TOSCA property definitions
+PROPERTY_KEYWORDS = frozenset([
+    'leaf', 'leaf-list', 'list', 'container', 'choice', 'augment'
+])
+
+# YANG statements that result in TOSCA metadata. A 'belongs-to'
+# statement on its own does not create a metadata section.
+METADATA_KEYWORDS = frozenset([
+    'yang-version', 'organization', 'contact', 'namespace', 'prefix',
+    'revision', 'reference', 'feature'
+])
+
+# Plain YAML scalars that would not be read back as strings
+YAML_RESERVED_WORDS = frozenset(['true', 'false', 'null', '~'])
+
+# Words (other than numbers) that float() accepts, ignoring case and sign
+FLOAT_WORDS = frozenset(['inf', 'infinity', 'nan'])
+
+# Only strings containing a digit are worth probing with float()
+re_digit = re.compile(r'\d')
+
+# Sub-statements handled by each emitter. Anything else is reported
+# as not handled by check_substmts.
+NO_SUBSTMTS = frozenset()
+HANDLED_MODULE = frozenset([
+    'augment', 'belongs-to', 'contact', 'container', 'description',
+    'feature', 'grouping', 'import', 'include', 'list', 'namespace',
+    'organization', 'prefix', 'reference', 'revision', 'typedef',
+    'uses', 'yang-version'
+])
+HANDLED_REVISION = frozenset([
+    'description', 'reference'
+])
+HANDLED_FEATURE = frozenset([
+    'description', 'reference', 'status'
+])
+HANDLED_IMPORT_OR_INCLUDE = frozenset([
+    'prefix'
+])
+HANDLED_TYPEDEF = frozenset([
+    'default', 'description', 'reference', 'type', 'units'
+])
+HANDLED_GROUPING = frozenset([
+    'choice', 'container', 'description', 'grouping', 'leaf',
+    'leaf-list', 'list', 'reference', 'typedef', 'uses'
+])
+HANDLED_AUGMENTED_TYPE = frozenset([
+    'case', 'choice', 'container', 'description', 'if-feature', 'leaf',
+    'leaf-list', 'list', 'reference', 'uses', 'when'
+])
+HANDLED_DERIVED_FROM = frozenset([
+    'enum', 'fraction-digits', 'length', 'pattern', 'range', 'type'
+])
+HANDLED_ENUM = frozenset([
+    'description', 'value'
+])
+HANDLED_BIT = frozenset([
+    'description'
+])
+HANDLED_LEAF = frozenset([
+    'config', 'default', 'description', 'mandatory', 'must',
+    'reference', 'type', 'units', 'when'
+])
+HANDLED_MUST = frozenset([
+    'error-message'
+])
+HANDLED_LEAF_LIST = frozenset([
+    'config', 'description', 'max-elements', 'min-elements', 'must',
+    'reference', 'type', 'units', 'when'
+])
+HANDLED_LIST = frozenset([
+    'config', 'container', 'description', 'grouping', 'key', 'leaf',
+    'leaf-list', 'list', 'max-elements', 'min-elements', 'must',
+    'ordered-by', 'reference', 'typedef', 'unique', 'uses', 'when'
+])
+HANDLED_CONTAINER = frozenset([
+    'config', 'container', 'description', 'grouping', 'leaf',
+    'leaf-list', 'list', 'must', 'presence', 'reference', 'typedef',
+    'uses', 'when'
+])
+HANDLED_CHOICE = frozenset([
+    'case', 'config', 'default', 'description', 'leaf', 'mandatory'
+])
+HANDLED_CASE = frozenset([
+    'choice', 'container', 'description', 'leaf', 'leaf-list', 'list'
+])
+HANDLED_TYPE = frozenset([
+    'bit', 'enum', 'fraction-digits', 'length', 'path', 'pattern',
+    'range', 'type'
+])
+HANDLED_AUGMENT = frozenset([
+    'container', 'description', 'leaf', 'leaf-list', 'list', 'must',
+    'reference', 'uses', 'when'
+])
+
 # Regular expressions for parsing YANG range and length
-# expressions. Copied from pyang's syntax.py file
-length_str = '((min|max|[0-9]+)\s*' \
-             '(\.\.\s*' \
-             '(min|max|[0-9]+)\s*)?)'
-length_expr = length_str + '(\|\s*' + length_str + ')*'
+# expressions. Copied from pyang's syntax.py file. The patterns have
+# no nested repetition, so the standard 're' engine matches them in
+# linear time.
+length_str = r'((min|max|[0-9]+)\s*' \
+             r'(\.\.\s*' \
+             r'(min|max|[0-9]+)\s*)?)'
+length_expr = length_str + r'(\|\s*' + length_str + r')*'
 re_length_part = re.compile(length_str)
-range_str = '((\-INF|min|max|((\+|\-)?[0-9]+(\.[0-9]+)?))\s*' \
-            '(\.\.\s*' \
-            '(INF|min|max|(\+|\-)?[0-9]+(\.[0-9]+)?)\s*)?)'
-range_expr = range_str + '(\|\s*' + range_str + ')*'
+range_str = r'((\-INF|min|max|((\+|\-)?[0-9]+(\.[0-9]+)?))\s*' \
+            r'(\.\.\s*' \
+            r'(INF|min|max|(\+|\-)?[0-9]+(\.[0-9]+)?)\s*)?)'
+range_expr = range_str + r'(\|\s*' + range_str + r')*'
 re_range_part = re.compile(range_str)
 
 # Regular expressions for parsing YAML timestamps. Copied from
-# constructor.py in ruamel package
-timestamp_regexp = re.compile(
-    u'''^(?P<year>[0-9][0-9][0-9][0-9])
+# constructor.py in ruamel package. Only needed when escaping enum and
+# bit names, so it is compiled on first use by get_timestamp_regexp().
+timestamp_str = u'''^(?P<year>[0-9][0-9][0-9][0-9])
       -(?P<month>[0-9][0-9]?)
       -(?P<day>[0-9][0-9]?)
       (?:((?P<t>[Tt])|[ \\t]+)   # explictly not retaining extra spaces
@@ -50,7 +164,28 @@ timestamp_regexp = re.compile(
       :(?P<second>[0-9][0-9])
       (?:\\.(?P<fraction>[0-9]*))?
       (?:[ \\t]*(?P<tz>Z|(?P<tz_sign>[-+])(?P<tz_hour>[0-9][0-9]?)
-      (?::(?P<tz_minute>[0-9][0-9]))?))?)?$''', re.X)
+      (?::(?P<tz_minute>[0-9][0-9]))?))?)?$'''
+
+# Text wrapper for descriptions and other text. Reuse a single
+# instance rather than creating a new one for each call to
+# textwrap.wrap().
+text_wrapper = textwrap.TextWrapper()
+
+# TOSCA-specific command line options. Built once when the plugin is
+# loaded.
+TOSCA_OPTLIST = [
+    optparse.make_option('--tosca-debug',
+                         dest='tosca_debug',
+                         action="store_true",
+                         help='TOSCA debug'),
+    optparse.make_option('--camel-case',
+                         dest='camel_case',
+                         action="store_true",
+                         help='Use camel case capitalization style'),
+    optparse.make_option('--tosca-config-file',
+                         dest='tosca_config_file',
+                         help='Configuraton file for TOSCA translator'),
+]
 
 
 def pyang_plugin_init():
@@ -78,22 +213,8 @@ class ToscaPlugin(plugin.PyangPlugin):
         """Add tosca-specific command line options to the pyang program.
         """
 
-        optlist = [
-            optparse.make_option('--tosca-debug',
-                                 dest='tosca_debug',
-                                 action="store_true",
-                                 help='TOSCA debug'),
-            optparse.make_option('--camel-case',
-                                 dest='camel_case',
-                                 action="store_true",
-                                 help='Use camel case capitalization style'),
-            optparse.make_option('--tosca-config-file',
-                                 dest='tosca_config_file',
-                                 help='Configuraton file for TOSCA translator'),
-            ]
-
         group = optparser.add_option_group("TOSCA specific options")
-        group.add_options(optlist)
+        group.add_options(TOSCA_OPTLIST)
         return
 
     #########################################################################    
@@ -113,14 +234,31 @@ class ToscaPlugin(plugin.PyangPlugin):
     def setup_fmt(self, ctx):
         """Modify the Context at setup time.  Called for the selected plugin.
         """
+        # Enable debug logging before anything is logged, so that the
+        # config file notice is shown too
+        if ctx.opts.tosca_debug:
+            logging.basicConfig(level=logging.DEBUG)
+
         # Read config file
         tosca_config = cfg.read_tosca_config(ctx.opts.tosca_config_file)
 
-        # Extract type map
+        # Extract type map. Copy it into a plain dict with interned
+        # keys, since it is consulted for every distinct YANG type
+        # name. An empty 'type_map:' entry is treated as no type map.
         try:
-            ctx.type_map = tosca_config['type_map']
+            type_map = tosca_config['type_map'] or dict()
         except (KeyError, TypeError):
-            ctx.type_map = dict()
+            type_map = dict()
+        ctx.type_map = {
+            sys.intern(str(name)): tosca_type
+            for name, tosca_type in type_map.items()
+        }
+
+        # Namespaces of imported modules
+        ctx.imported_namespaces = dict()
+
+        # TOSCA types for YANG type names
+        ctx.tosca_types = dict()
         return
 
     def pre_load_modules(self, ctx):
@@ -160,19 +298,29 @@ class ToscaPlugin(plugin.PyangPlugin):
 
         Raise error.EmitError on failure.
         """
-        if ctx.opts.tosca_debug:
-            logging.basicConfig(level=logging.DEBUG)
+        # The emitters issue a large number of small writes. Unless
+        # we're writing to a terminal, collect the output in memory and
+        # write it out all at once.
+        if fd.isatty():
+            out = fd
+        else:
+            out = io.StringIO()
 
-        # Write all modules
+        # Write all modules. This plugin does not set multiple_modules,
+        # so pyang refuses to run with more than one module and this
+        # loop normally runs once.
         for module in modules:
-            emit_module(ctx, module, fd, '')
+            emit_module(ctx, module, out, 0)
+
+        if out is not fd:
+            fd.write(out.getvalue())
 
 
 #########################################################################    
 # Top-level method that generates a TOSCA definitions file
 #########################################################################    
 
-def emit_module(ctx, stmt, fd, indent):
+def emit_module(ctx, stmt, fd, depth):
     """Convert a YANG module to TOSCA by (recursively) converting each of
     the YANG statements in the YANG module to TOSCA.
 
@@ -213,77 +361,51 @@ def emit_module(ctx, stmt, fd, indent):
     # uses          0..n        
     # yang-version  1           
 
-    # Emit tosca header
-    fd.write("tosca_definitions_version: tosca_simple_yaml_1_3\n\n")
-    
-    # Add comment
+    # Emit tosca header and comment
     fd.write(
-        "# This template was auto-generated by yang2tosca from the YANG module '%s'\n\n"
-        % stmt.arg
+        "tosca_definitions_version: tosca_simple_yaml_1_3\n\n"
+        f"# This template was auto-generated by yang2tosca from the YANG module '{stmt.arg}'\n\n"
     )
     
     # Emit description:
     description = stmt.search_one("description")
     if description:
-        emit_description(ctx, description, fd, indent)
+        emit_description(ctx, description, fd, depth)
         fd.write("\n")
 
     # Emit metadata
-    emit_metadata(ctx, stmt, fd, indent)
+    emit_metadata(ctx, stmt, fd, depth)
     fd.write("\n")
 
     # Emit imports and includes
-    emit_imports_and_includes(ctx, stmt, fd, indent)
+    emit_imports_and_includes(ctx, stmt, fd, depth)
     fd.write("\n")
 
     # Beginning of data type definition section
     fd.write("data_types:\n\n")
-    indent = indent + '  '
+    depth = depth + 1
 
     # Emit data types defined in this module
-    emit_data_types_in_stmt(ctx, stmt, fd, indent)
+    emit_data_types_in_stmt(ctx, stmt, fd, depth)
 
     # Sanity checking. To be removed later
-    handled = [
-        'augment',
-        'belongs-to',
-        'contact',
-        'container',
-        'description',
-        'feature',
-        'grouping',
-        'import',
-        'include',
-        'list',
-        'namespace',
-        'organization',
-        'prefix',
-        'reference',
-        'revision',
-        'typedef',
-        'uses',
-        'yang-version'
-    ]
-    check_substmts(stmt, handled)
+    check_substmts(stmt, HANDLED_MODULE)
 
 
 #########################################################################    
 # Generate TOSCA description
 #########################################################################    
 
-def emit_description(ctx, stmt, fd, indent):
+def emit_description(ctx, stmt, fd, depth):
 
+    indent = INDENTS[depth]
     # Emit description key
-    fd.write(
-        "%sdescription: "
-        % (indent)
-    )
+    fd.write(f"{indent}description: ")
     # Emit text. Split into multiple lines if necessary
-    lines = wrap_text(stmt.arg)
-    emit_text_string(ctx, lines, fd, indent)
+    lines = get_wrapped_text(stmt)
+    emit_text_string(ctx, lines, fd, depth)
 
-    handled = []
-    check_substmts(stmt, handled)
+    check_substmts(stmt, NO_SUBSTMTS)
 
 
 def wrap_text(text_string):
@@ -298,258 +420,236 @@ def wrap_text(text_string):
         return lines
 
     # Not already formatted. Wrap it ourselves.
-    return textwrap.wrap(text_string)
+    return text_wrapper.wrap(text_string)
+
+
+def get_wrapped_text(stmt):
+    """Return the wrapped lines for the argument of a text statement.
+    Descriptions in groupings are emitted once for every type that
+    uses them, so the result is cached on the statement.
+    """
+    try:
+        return stmt.i_tosca_wrapped_text
+    except AttributeError:
+        pass
 
+    stmt.i_tosca_wrapped_text = wrap_text(stmt.arg)
+    return stmt.i_tosca_wrapped_text
 
-def emit_text_string(ctx, lines, fd, indent):
+
+def format_comment(stmt, depth):
+    """Format the argument of a text statement as a block of YAML
+    comment lines, wrapped the same way as other text values.
+    """
+    prefix = INDENTS[depth] + '# '
+    return "".join([f"{prefix}{line}\n" for line in get_wrapped_text(stmt)])
+
+
+def emit_text_string(ctx, lines, fd, depth):
     """Write a text value. We use YAML folded style if the text consists
     of multiple lines or if it includes a colon character (or some
     other character that would violate YAML syntax)
     """
     if not lines:
-        lines = [""]
-    if len(lines) > 1 or (':' in lines[0]) or ('\'' in lines[0]):
-        # Emit folding character
-        fd.write(">-\n")
-        # Emit individual lines. Make sure the first line is indented
-        # correctly.
-        first = True
-        for line in lines:
-            if first:
-                fd.write(
-                    "%s%s\n"
-                    % (indent + '  ', line.lstrip())
-                )
-                first = False
-            else:
-                fd.write(
-                    "%s%s\n"
-                    % (indent + '  ', line.lstrip())
-                )
-    else:
-        fd.write("%s\n"
-                 % lines[0]
-        )
+        # Empty text
+        fd.write("\n")
+        return
+    if len(lines) == 1:
+        # Single line of text. This is the most common case, and it
+        # doesn't need folded style unless it contains special
+        # characters.
+        line = lines[0]
+        if ':' not in line and '\'' not in line:
+            fd.write(f"{line}\n")
+            return
+
+    # Emit folding character followed by the individual lines,
+    # indented underneath the key
+    prefix = INDENTS[depth + 1]
+    fd.write(">-\n" + "".join([f"{prefix}{line.lstrip()}\n" for line in lines]))
 
 
 #########################################################################    
 # Generate TOSCA metadata
 #########################################################################    
 
-def emit_metadata(ctx, stmt, fd, indent):
+def emit_metadata(ctx, stmt, fd, depth):
     """YANG statements that do not have a TOSCA equivalent are translated
     into TOSCA metadata.
     """
 
-    yang_version = stmt.search_one('yang-version')
-    organization = stmt.search_one('organization')
-    contact = stmt.search_one('contact')
-    namespace = stmt.search_one("namespace")
-    prefix = stmt.search_one("prefix")
-    belongs_to = stmt.search_one('belongs-to')
-    revisions = stmt.search('revision')
-    reference = stmt.search_one('reference')
-    features = stmt.search('feature')
-
-    if yang_version or organization or contact or reference \
-       or len(revisions) or len(features) or namespace or prefix:
-        fd.write(
-            "%smetadata:\n"
-            % indent
-        )
-        indent = indent + '  '
-        if yang_version: 
-            emit_yang_version(ctx, yang_version, fd, indent)
-        if organization: 
-            emit_organization(ctx, organization, fd, indent)
-        if contact: 
-            emit_contact(ctx, contact, fd, indent)
-        if namespace:
-            emit_namespace(ctx, namespace, fd, indent)
-        if prefix:
-            emit_prefix(ctx, prefix, fd, indent)
-        if belongs_to:
-            emit_belongs_to(ctx, belongs_to, fd, indent)
-        if len(revisions):
-            emit_revisions(ctx, revisions, fd, indent)
-        if reference: 
-            emit_reference(ctx, reference, fd, indent)
-        if len(features):
-            emit_features(ctx, features, fd, indent)
-
-
-def emit_yang_version(ctx, stmt, fd, indent):
-    fd.write(
-        "%syang-version: %s\n"
-        % (indent, stmt.arg)
-    )
-    handled = []
-    check_substmts(stmt, handled)
-
-
-def emit_organization(ctx, stmt, fd, indent):
-    fd.write(
-        "%sorganization: "
-        % (indent)
-    )
-    lines = wrap_text(stmt.arg)
-    emit_text_string(ctx, lines, fd, indent)
-    handled = []
-    check_substmts(stmt, handled)
-
-
-def emit_contact(ctx, stmt, fd, indent):
-    fd.write(
-        "%scontact: "
-        % (indent)
-    )
-    lines = wrap_text(stmt.arg)
-    emit_text_string(ctx, lines, fd, indent)
-    handled = []
-    check_substmts(stmt, handled)
-
-
-def emit_namespace(ctx, stmt, fd, indent):
-    fd.write(
-        "%snamespace: %s\n"
-        % (indent, stmt.arg)
-    )
-
-
-def emit_prefix(ctx, stmt, fd, indent):
-    fd.write(
-        "%s# TOSCA does not support prefix for local namespaces\n"
-        % indent
-    )
+    indent = INDENTS[depth]
+    substmts = group_substmts(stmt)
+    if METADATA_KEYWORDS.isdisjoint(substmts):
+        return
+    yang_version = first_substmt(substmts, 'yang-version')
+    organization = first_substmt(substmts, 'organization')
+    contact = first_substmt(substmts, 'contact')
+    namespace = first_substmt(substmts, 'namespace')
+    prefix = first_substmt(substmts, 'prefix')
+    belongs_to = first_substmt(substmts, 'belongs-to')
+    revisions = substmts['revision']
+    reference = first_substmt(substmts, 'reference')
+    features = substmts['feature']
+
+    fd.write(f"{indent}metadata:\n")
+    depth = depth + 1
+    if yang_version: 
+        emit_yang_version(ctx, yang_version, fd, depth)
+    if organization: 
+        emit_organization(ctx, organization, fd, depth)
+    if contact: 
+        emit_contact(ctx, contact, fd, depth)
+    if namespace:
+        emit_namespace(ctx, namespace, fd, depth)
+    if prefix:
+        emit_prefix(ctx, prefix, fd, depth)
+    if belongs_to:
+        emit_belongs_to(ctx, belongs_to, fd, depth)
+    if revisions:
+        emit_revisions(ctx, revisions, fd, depth)
+    if reference: 
+        emit_reference(ctx, reference, fd, depth)
+    if features:
+        emit_features(ctx, features, fd, depth)
+
+
+def emit_yang_version(ctx, stmt, fd, depth):
+    indent = INDENTS[depth]
+    fd.write(f"{indent}yang-version: {stmt.arg}\n")
+    check_substmts(stmt, NO_SUBSTMTS)
+
+
+def emit_organization(ctx, stmt, fd, depth):
+    indent = INDENTS[depth]
+    fd.write(f"{indent}organization: ")
+    lines = get_wrapped_text(stmt)
+    emit_text_string(ctx, lines, fd, depth)
+    check_substmts(stmt, NO_SUBSTMTS)
+
+
+def emit_contact(ctx, stmt, fd, depth):
+    indent = INDENTS[depth]
+    fd.write(f"{indent}contact: ")
+    lines = get_wrapped_text(stmt)
+    emit_text_string(ctx, lines, fd, depth)
+    check_substmts(stmt, NO_SUBSTMTS)
+
+
+def emit_namespace(ctx, stmt, fd, depth):
+    indent = INDENTS[depth]
+    fd.write(f"{indent}namespace: {stmt.arg}\n")
+
+
+def emit_prefix(ctx, stmt, fd, depth):
+    indent = INDENTS[depth]
     fd.write(
-        "%sprefix: %s\n"
-        % (indent, stmt.arg)
+        f"{indent}# TOSCA does not support prefix for local namespaces\n"
+        f"{indent}prefix: {stmt.arg}\n"
     )
     # Track local prefix in context since we may need it later
     ctx.local_prefix = stmt.arg
 
 
-def emit_belongs_to(ctx, stmt, fd, indent):
+def emit_belongs_to(ctx, stmt, fd, depth):
     # Sub-statements for the belongs_to statement:
     #
     # prefix        1           
-    fd.write(
-        "%sbelongs-to: %s\n"
-        % (indent, stmt.arg)
-    )
+    indent = INDENTS[depth]
+    fd.write(f"{indent}belongs-to: {stmt.arg}\n")
 
 
-def emit_revisions(ctx, revisions, fd, indent):
-    fd.write(
-        "%srevisions:\n"
-        % indent
-    )
+def emit_revisions(ctx, revisions, fd, depth):
+    indent = INDENTS[depth]
+    fd.write(f"{indent}revisions:\n")
     for revision in revisions:
-        emit_revision(ctx, revision, fd, indent + '  ')
+        emit_revision(ctx, revision, fd, depth + 1)
 
 
-def emit_revision(ctx, stmt, fd, indent):
+def emit_revision(ctx, stmt, fd, depth):
 
     # Sub-statements for the revision statement:
     #
     # description   0..1        
     # reference     0..1        
-    description = stmt.search_one('description')
-    reference = stmt.search_one('reference')
-    handled = [
-        'description',
-        'reference'
-    ]
-    check_substmts(stmt, handled)
+    indent = INDENTS[depth]
+    substmts = group_substmts(stmt)
+    description = first_substmt(substmts, 'description')
+    reference = first_substmt(substmts, 'reference')
+    check_substmts(stmt, HANDLED_REVISION)
 
     if not description and not reference:
         return
 
     # Emit the revision
-    fd.write(
-        "%s'%s':\n"
-        % (indent, stmt.arg)
-    )
-    indent = indent + '  '
+    fd.write(f"{indent}'{stmt.arg}':\n")
+    depth = depth + 1
     if description:
-        emit_description(ctx, description, fd, indent)
+        emit_description(ctx, description, fd, depth)
     if reference:
-        emit_reference(ctx, reference, fd, indent)
+        emit_reference(ctx, reference, fd, depth)
 
 
-def emit_reference(ctx, stmt, fd, indent):
+def emit_reference(ctx, stmt, fd, depth):
 
+    indent = INDENTS[depth]
     # Check if text needs to be wrapped
-    lines = wrap_text(stmt.arg)
+    lines = get_wrapped_text(stmt)
 
     # Emit reference key
-    fd.write(
-        "%sreference: "
-        % (indent)
-    )
+    fd.write(f"{indent}reference: ")
     # Emit text
-    emit_text_string(ctx, lines, fd, indent)
+    emit_text_string(ctx, lines, fd, depth)
 
-    handled = []
-    check_substmts(stmt, handled)
+    check_substmts(stmt, NO_SUBSTMTS)
 
 
-def emit_features(ctx, features, fd, indent):
-    fd.write(
-        "%sfeatures:\n"
-        % indent
-    )
+def emit_features(ctx, features, fd, depth):
+    indent = INDENTS[depth]
+    fd.write(f"{indent}features:\n")
     for feature in features:
-        emit_feature(ctx, feature, fd, indent + '  ')
+        emit_feature(ctx, feature, fd, depth + 1)
 
 
-def emit_feature(ctx, stmt, fd, indent):
+def emit_feature(ctx, stmt, fd, depth):
     # Sub-statements for the feature statement:
     #
     # description   0..1        
     # if-feature    0..n        
     # reference     0..1        
     # status        0..1        
-    description = stmt.search_one('description')
-    reference = stmt.search_one('reference')
-    status = stmt.search_one('status')
+    indent = INDENTS[depth]
+    substmts = group_substmts(stmt)
+    description = first_substmt(substmts, 'description')
+    reference = first_substmt(substmts, 'reference')
+    status = first_substmt(substmts, 'status')
 
-    handled = [
-        'description',
-        'reference',
-        'status'
-    ]
-    check_substmts(stmt, handled)
+    check_substmts(stmt, HANDLED_FEATURE)
 
     if not description and not reference and not status:
         return
 
     # Emit the feature
-    fd.write(
-        "%s'%s':\n"
-        % (indent, stmt.arg)
-    )
-    indent = indent + '  '
+    fd.write(f"{indent}'{stmt.arg}':\n")
+    depth = depth + 1
     if description:
-        emit_description(ctx, description, fd, indent)
+        emit_description(ctx, description, fd, depth)
     if reference:
-        emit_reference(ctx, reference, fd, indent)
+        emit_reference(ctx, reference, fd, depth)
     if status:
-        emit_status(ctx, status, fd, indent)
+        emit_status(ctx, status, fd, depth)
 
 
-def emit_status(ctx, stmt, fd, indent):
+def emit_status(ctx, stmt, fd, depth):
+    indent = INDENTS[depth]
     # Emit status key
-    fd.write(
-        "%sstatus: %s"
-        % (indent, stmt.arg)
-    )
+    fd.write(f"{indent}status: {stmt.arg}")
 
 #########################################################################    
 # Generate TOSCA import statements
 #########################################################################    
 
-def emit_imports_and_includes(ctx, stmt, fd, indent):
+def emit_imports_and_includes(ctx, stmt, fd, depth):
     """Both YANG 'import' and 'include' statements are translated into
     TOSCA import statements. However, YANG 'include' statements do not
     use a namespace prefix. Instead, definitions from the 'included'
@@ -559,24 +659,23 @@ def emit_imports_and_includes(ctx, stmt, fd, indent):
     imports = stmt.search('import')
     includes = stmt.search('include')
     
-    fd.write(
-        "imports:\n"
-    )
-    indent = indent + '  '
+    depth = depth + 1
+    indent = INDENTS[depth]
     # Always import built-in YANG types
     fd.write(
-        "%s- file: %s\n%s  namespace_prefix: %s\n"
-        % (indent, IETF_NAMESPACE, indent, IETF_NAMESPACE_PREFIX)
+        "imports:\n"
+        f"{indent}- file: {IETF_NAMESPACE}\n"
+        f"{indent}  namespace_prefix: {IETF_NAMESPACE_PREFIX}\n"
     )
     # Add imports 
     for imprt in imports:
-        emit_import_or_include(ctx, imprt, fd, indent)
+        emit_import_or_include(ctx, imprt, fd, depth)
     # Add includes
     for include in includes:
-        emit_import_or_include(ctx, include, fd, indent)
+        emit_import_or_include(ctx, include, fd, depth)
 
 
-def emit_import_or_include(ctx, stmt, fd, indent):
+def emit_import_or_include(ctx, stmt, fd, depth):
 
     # Sub-statements for the import statement:
     #
@@ -585,51 +684,54 @@ def emit_import_or_include(ctx, stmt, fd, indent):
     # reference      0..1        
     # revision-date  0..1        
 
-    # TOSCA will import the module by its namespace name.  First, find
-    # the imported module from the context
-    imported_module = ctx.get_module(stmt.arg)
+    indent = INDENTS[depth]
+    # TOSCA will import the module by its namespace name.
     imported_module_name = stmt.arg + '.yaml'
+    imported_namespace_name = get_imported_namespace(ctx, stmt.arg)
 
-    if imported_module is not None:
-        # Find namespace of imported module
-        imported_namespace = imported_module.search_one("namespace")
-        if imported_namespace is not None:
-            imported_namespace_name = imported_namespace.arg
-        else:
-            imported_namespace_name = None
-    else:
-        imported_namespace_name = None
-        
     # Emit import statement
     prefix = stmt.search_one('prefix')
     if prefix or imported_namespace_name:
         fd.write(
-            "%s- file: %s\n"
-            % (indent, imported_module_name)
-        )
-        fd.write(
-            "%s  namespace_prefix: %s\n"
-            % (indent, prefix.arg)
+            f"{indent}- file: {imported_module_name}\n"
+            f"{indent}  namespace_prefix: {prefix.arg}\n"
         )
         if imported_namespace_name:
-            fd.write(
-                "%s  # namespace: %s\n"
-                % (indent, imported_namespace_name)
-        )
+            fd.write(f"{indent}  # namespace: {imported_namespace_name}\n")
     else:
-        fd.write(
-            "%s- %s\n"
-            % (indent, imported_module_name)
-        )
-    handled = ['prefix']
-    check_substmts(stmt, handled)
+        fd.write(f"{indent}- {imported_module_name}\n")
+    check_substmts(stmt, HANDLED_IMPORT_OR_INCLUDE)
+
+
+def get_imported_namespace(ctx, module_name):
+    """Find the namespace of an imported module. Returns None if the
+    module or its namespace cannot be found. The same modules tend to
+    be imported over and over again, so results are cached in the
+    context.
+    """
+    try:
+        return ctx.imported_namespaces[module_name]
+    except KeyError:
+        pass
+
+    # Find the imported module from the context
+    imported_namespace_name = None
+    imported_module = ctx.get_module(module_name)
+    if imported_module is not None:
+        # Find namespace of imported module
+        imported_namespace = imported_module.search_one("namespace")
+        if imported_namespace is not None:
+            imported_namespace_name = imported_namespace.arg
+
+    ctx.imported_namespaces[module_name] = imported_namespace_name
+    return imported_namespace_name
 
 
 #########################################################################    
 # Generate TOSCA data type definitions
 #########################################################################    
 
-def emit_data_types_in_stmt(ctx, stmt, fd, indent):
+def emit_data_types_in_stmt(ctx, stmt, fd, depth):
     """Emit TOSCA data types for substatements of this statement. Data
     type definitions are generated for each of the following YANG
     statements:
@@ -642,66 +744,106 @@ def emit_data_types_in_stmt(ctx, stmt, fd, indent):
     - augment (at the module level)
     - augment (within uses statement)
 
+    Data types for statements nested inside other statements are
+    emitted before the data types of the statements that contain
+    them. Rather than recursing through the YANG tree, we keep an
+    explicit stack of pending steps so deeply nested modules don't
+    exhaust the Python stack.
     """
 
+    # Each step is an (emitter, statement) tuple. Steps without an
+    # emitter are replaced by the steps for the substatements of their
+    # statement.
+    steps = [(None, stmt)]
+    while steps:
+        emitter, sub = steps.pop()
+        if emitter:
+            emitter(ctx, sub, fd, depth)
+        else:
+            steps.extend(reversed(get_data_type_steps(sub)))
+
+
+def get_data_type_steps(stmt):
+    """Return the steps needed to emit TOSCA data types for the
+    substatements of this statement, in the order in which they must
+    be taken.
+    """
+    steps = []
+    substmts = group_substmts(stmt)
+
     # Emit data type definitions for 'typedef' statements
-    typedefs = stmt.search('typedef')
+    typedefs = substmts['typedef']
     for typedef in typedefs:
-        emit_typedef(ctx, typedef, fd, indent)
-        fd.write("\n")
+        steps.append((emit_typedef, typedef))
+        steps.append((emit_blank_line, typedef))
 
     # Emit data type definitions for 'grouping' statements
-    groupings = stmt.search('grouping')
+    groupings = substmts['grouping']
     for grouping in groupings:
-        emit_grouping(ctx, grouping, fd, indent)
-        fd.write("\n")
+        steps.append((None, grouping))
+        steps.append((emit_grouping, grouping))
+        steps.append((emit_blank_line, grouping))
 
     # Emit data type definitions for 'container' statements
-    containers = stmt.search('container')
+    containers = substmts['container']
     for container in containers:
         # If a container has a single 'uses' statement only, there is
         # no need to create a separate data type for it. We'll just
         # use the data type for the 'grouping' specified in the 'uses'
         # statement.
         if not has_single_uses_stmt_only(container):
-            emit_data_type(ctx, container, fd, indent)
-            fd.write("\n")
+            steps.append((None, container))
+            steps.append((emit_data_type, container))
+            steps.append((emit_blank_line, container))
 
     # Emit data type definitions for 'list' statements
-    lists = stmt.search('list')
+    lists = substmts['list']
     for lst in lists:
         # If a container has a single 'uses' statement only, there is
         # no need to create a separate data type for it. We'll just
         # use the data type for the 'grouping' specified in the 'uses'
         # statement.
         if not has_single_uses_stmt_only(lst):
-            emit_data_type(ctx, lst, fd, indent)
-            fd.write("\n")
+            steps.append((None, lst))
+            steps.append((emit_data_type, lst))
+            steps.append((emit_blank_line, lst))
 
     # Emit data type definitions underneath 'uses' statements
-    usess = stmt.search('uses')
+    usess = substmts['uses']
     for uses in usess:
         augments = uses.search('augment')
         for augment in augments:
-            print("Warning: review <%s> augments <%s>" % (augment.arg, uses.arg))
-            emit_data_type(ctx, augment, fd, indent)
-            fd.write("\n")
+            steps.append((warn_uses_augment, augment))
+            steps.append((None, augment))
+            steps.append((emit_data_type, augment))
+            steps.append((emit_blank_line, augment))
 
     # Handle type definitions underneath 'choice' statements 
-    choices = stmt.search('choice')
+    choices = substmts['choice']
     for choice in choices:
         cases = choice.search('case')
         for case in cases:
-            emit_data_types_in_stmt(ctx, case, fd, indent)
+            steps.append((None, case))
 
     # Handle type definitions based on 'augment' statements
-    augmentations = stmt.search('augment')
+    augmentations = substmts['augment']
     for augment in augmentations:
-        emit_augmented_type(ctx, augment, fd, indent)
-        fd.write("\n")
+        steps.append((None, augment))
+        steps.append((emit_augmented_type, augment))
+        steps.append((emit_blank_line, augment))
+
+    return steps
+
+
+def emit_blank_line(ctx, stmt, fd, depth):
+    fd.write("\n")
+
 
+def warn_uses_augment(ctx, stmt, fd, depth):
+    print(f"Warning: review <{stmt.arg}> augments <{stmt.parent.arg}>")
 
-def emit_typedef(ctx, stmt, fd, indent):
+
+def emit_typedef(ctx, stmt, fd, depth):
     """Create a TOSCA data type definition from a YANG 'typedef'
     statement"""
 
@@ -714,41 +856,33 @@ def emit_typedef(ctx, stmt, fd, indent):
     # type          1           
     # units         0..1        
 
-    derived_from = stmt.search_one('type')
-    units = stmt.search_one('units')
-    default = stmt.search_one('default')
-    description = stmt.search_one('description')
+    indent = INDENTS[depth]
+    substmts = group_substmts(stmt)
+    derived_from = first_substmt(substmts, 'type')
+    units = first_substmt(substmts, 'units')
+    default = first_substmt(substmts, 'default')
+    description = first_substmt(substmts, 'description')
 
     # Find name for this data type
     name = stmt.arg
 
     # # Write out data type
-    fd.write(
-        "%s%s:\n"
-        % (indent, name)
-    )
-    indent = indent + '  '
+    fd.write(f"{indent}{name}:\n")
+    depth = depth + 1
     if description:
-        emit_description(ctx, description, fd, indent)
+        emit_description(ctx, description, fd, depth)
     if derived_from:
-        emit_derived_from(ctx, derived_from, fd, indent)
+        emit_derived_from(ctx, derived_from, fd, depth)
     if units:
-        emit_units(ctx, units, fd, indent)
+        emit_units(ctx, units, fd, depth)
     if default:
-        emit_commented_default(ctx, default, fd, indent)
-    emit_metadata(ctx, stmt, fd, indent)
+        emit_commented_default(ctx, default, fd, depth)
+    emit_metadata(ctx, stmt, fd, depth)
 
-    handled = [
-        'default',
-        'description',
-        'reference',
-        'type',
-        'units',
-    ]
-    check_substmts(stmt, handled)
+    check_substmts(stmt, HANDLED_TYPEDEF)
 
 
-def emit_grouping(ctx, stmt, fd, indent):
+def emit_grouping(ctx, stmt, fd, depth):
     """Create a TOSCA data type definition from a YANG 'grouping'
     statemen. This methods is just a wrapper around emit_data_type so
     we can check_substmts here.
@@ -772,21 +906,9 @@ def emit_grouping(ctx, stmt, fd, indent):
     # typedef       0..n        
     # uses          0..n        
 
-    emit_data_type(ctx, stmt, fd, indent)
+    emit_data_type(ctx, stmt, fd, depth)
 
-    handled = [
-        'choice',
-        'container',
-        'description',
-        'grouping',
-        'leaf',
-        'leaf-list',
-        'list',
-        'reference',
-        'typedef',
-        'uses'
-    ]
-    check_substmts(stmt, handled)
+    check_substmts(stmt, HANDLED_GROUPING)
 
 
 def has_single_uses_stmt_only(stmt):
@@ -794,18 +916,19 @@ def has_single_uses_stmt_only(stmt):
     without defining its own properties
     """
 
-    # First, check 'uses' substatements
-    usess = stmt.search('uses')
-    if len(usess) != 1:
-        return False
-
-    # Then check local property definitions
+    # Count 'uses' substatements and check local property definitions
+    # in a single pass. Bail out as soon as we know the answer.
+    num_uses = 0
     for sub in stmt.substmts:
-        if sub.keyword in ['leaf','leaf-list','list','container','choice','augment']:
+        if sub.keyword == 'uses':
+            num_uses = num_uses + 1
+            if num_uses > 1:
+                return False
+        elif sub.keyword in PROPERTY_KEYWORDS:
             return False
 
-    # Has single uses statement only
-    return True
+    # Has single uses statement only?
+    return num_uses == 1
 
 
 def get_single_uses_stmt_grouping(ctx, stmt):
@@ -817,7 +940,7 @@ def get_single_uses_stmt_grouping(ctx, stmt):
     return create_qualified_name(ctx, usess[0].arg)
 
 
-def emit_data_type(ctx, stmt, fd, indent):
+def emit_data_type(ctx, stmt, fd, depth):
     """Create a TOSCA data type definition from a YANG statement. This
     method is used for 'container', 'grouping', and 'list'
     statements. These statements are different from other YANG
@@ -831,92 +954,87 @@ def emit_data_type(ctx, stmt, fd, indent):
     As a result, these YANG statements are processed twice (in two
     different passes). Rather than calling 'check_substmt' here, we
     call it in the method that emits the property definition.
-    """
 
-    # First, recurse to make sure all other typedefs, containers,
-    # lists, groupings, choices, and augments defined underneath this
-    # statement are reflected into top-level TOSCA data type
-    # definitions.
-    emit_data_types_in_stmt(ctx, stmt, fd, indent)
+    Data types for all other typedefs, containers, lists, groupings,
+    choices, and augments defined underneath this statement must
+    already have been emitted (by emit_data_types_in_stmt).
+    """
 
+    indent = INDENTS[depth]
     # Find the name for this data type
     name = stmt.arg
 
     # Write out a data type definition for this statement
-    fd.write(
-        "%s%s:\n"
-        % (indent, name)
-    )
-    indent = indent + '  '
-    description = stmt.search_one('description')
+    fd.write(f"{indent}{name}:\n")
+    depth = depth + 1
+    indent = INDENTS[depth]
+    substmts = group_substmts(stmt)
+    description = first_substmt(substmts, 'description')
     if description:
-        emit_description(ctx, description, fd, indent)
-    emit_metadata(ctx, stmt, fd, indent)
+        emit_description(ctx, description, fd, depth)
+    emit_metadata(ctx, stmt, fd, depth)
 
     # We use the grouping name specified in the first 'uses' statement
     # as the name of the TOSCA parent type
-    uses = stmt.search('uses')
-    if len(uses):
-        emit_uses_derived_from(ctx, stmt, uses[0], fd, indent)
+    uses = substmts['uses']
+    if uses:
+        emit_uses_derived_from(ctx, stmt, uses[0], fd, depth)
     # Emit constraints
-    when = stmt.search_one('when')
+    when = first_substmt(substmts, 'when')
     if when:
-        emit_when(ctx, when, fd, indent)
-    must = stmt.search_one('must')
+        emit_when(ctx, when, fd, depth)
+    must = first_substmt(substmts, 'must')
     if must:
-        emit_must(ctx, must, fd, indent)
+        emit_must(ctx, must, fd, depth)
+
+    # Find local property and attribute definitions, and whether any
+    # are defined locally or in the groupings of the remaining 'uses'
+    props, attrs = classify_properties(stmt)
+    has_props, has_attrs = get_property_flags(stmt)
 
     # First add property definitions if necessary
-    has_props = has_properties(stmt)
     if has_props:
-        fd.write(
-            "%sproperties:\n"
-            % (indent)
-        )
-        emit_properties(ctx, stmt, fd, indent+'  ', prop=True)
+        fd.write(f"{indent}properties:\n")
+        emit_property_definitions(ctx, props, fd, depth + 1, prop=True)
 
         # If we have more than one uses statement, we'll just copy the
         # property definitions from the grouping specified in each
         # remaining 'uses' statement
         if len(uses) > 1:
-            emit_uses_properties(ctx, stmt, uses[1:], fd, indent+'  ')
+            emit_uses_properties(ctx, stmt, uses[1:], fd, depth + 1)
 
     # If necessary add attribute definitions (marked using "config false" in
     # YANG). Note that TOSCA data type definitions do not support
     # attributes. We just mark which property definitions need to be
     # converted to attribute definitions when TOSCA data types are
     # converted to node types.
-    if has_attributes(stmt):
-        fd.write("%s# TOSCA data types do not support attributes\n"
-                 % (indent)
-                 )
-        fd.write("%s# Enable attributes when converting to a node type\n"
-                 % (indent)
-                 )
-
+    if has_attrs:
+        parts = [
+            f"{indent}# TOSCA data types do not support attributes\n",
+            f"{indent}# Enable attributes when converting to a node type\n"
+        ]
         if not has_props:
             # We have not previously emitted the 'properties' key
-            fd.write(
-                "%sproperties:\n"
-                % (indent)
-            )
-        fd.write(
-            "%s# attributes:\n"
-            % (indent)
-        )
-        emit_properties(ctx, stmt, fd, indent+'  ', prop=False)
+            parts.append(f"{indent}properties:\n")
+        parts.append(f"{indent}# attributes:\n")
+        fd.write("".join(parts))
+        emit_property_definitions(ctx, attrs, fd, depth + 1, prop=False)
 
     # If we have more than one uses statement, we'll just add the
     # attributes from the grouping specified in each 'uses' statement
     if len(uses) > 1:
-        emit_uses_attributes(ctx, stmt, uses[1:], fd, indent+'  ')
+        emit_uses_attributes(ctx, stmt, uses[1:], fd, depth + 1)
 
 
-def emit_augmented_type(ctx, stmt, fd, indent):
+def emit_augmented_type(ctx, stmt, fd, depth):
     """Create a TOSCA data type definition from a YANG 'augment' statement
     in the top-level module. This method creates a TOSCA data type
     that derives from the TOSCA data type that corresponds to the
     entity being augmented.
+
+    Data types for all other typedefs, containers, and groupings
+    defined underneath this statement must already have been emitted
+    (by emit_data_types_in_stmt).
     """
 
     # Sub-statements for the augment statement:
@@ -938,99 +1056,68 @@ def emit_augmented_type(ctx, stmt, fd, indent):
     # uses          0..n        
     # when          0..1        
 
-    # First, recurse to make sure all other typedefs, containers, and
-    # groupings defined underneath this statement are reflected in
-    # top-level data type
-    emit_data_types_in_stmt(ctx, stmt, fd, indent)
-
+    indent = INDENTS[depth]
     # Find qualified name for this data type
     name = stmt.i_target_node.arg
 
     # Write out a data type definition for this statement
-    fd.write(
-        "%s%s:\n"
-        % (indent, name)
-    )
-    indent = indent + '  '
-    description = stmt.search_one('description')
+    fd.write(f"{indent}{name}:\n")
+    depth = depth + 1
+    indent = INDENTS[depth]
+    substmts = group_substmts(stmt)
+    description = first_substmt(substmts, 'description')
     if description:
-        emit_description(ctx, description, fd, indent)
+        emit_description(ctx, description, fd, depth)
 
-    if_feature = stmt.search_one('if-feature')
+    if_feature = first_substmt(substmts, 'if-feature')
     if if_feature:
-        emit_if_feature(ctx, if_feature, fd, indent)
+        emit_if_feature(ctx, if_feature, fd, depth)
 
     # Find the TOSCA data type from which this type derives
-    path = stmt.arg.split('/')
-    if path[0]:
+    if not stmt.arg.startswith('/'):
         print("Augment does not specify an absolute path")
-    derived_from = create_qualified_name(ctx, path[-1])
-    fd.write(
-        "%sderived_from: %s\n"
-        % (indent, derived_from)
-    )
+    derived_from = create_qualified_name(ctx, stmt.arg.rpartition('/')[2])
+    fd.write(f"{indent}derived_from: {derived_from}\n")
 
-    emit_metadata(ctx, stmt, fd, indent)
+    emit_metadata(ctx, stmt, fd, depth)
 
     # Emit constraints
-    when = stmt.search_one('when')
+    when = first_substmt(substmts, 'when')
     if when:
-        emit_when(ctx, when, fd, indent)
-    must = stmt.search_one('must')
+        emit_when(ctx, when, fd, depth)
+    must = first_substmt(substmts, 'must')
     if must:
-        emit_must(ctx, must, fd, indent)
+        emit_must(ctx, must, fd, depth)
 
     # Add properties
-    fd.write(
-        "%sproperties:\n"
-        % (indent)
-    )
-    emit_properties(ctx, stmt, fd, indent+'  ', prop=True)
+    fd.write(f"{indent}properties:\n")
+    emit_properties(ctx, stmt, fd, depth + 1, prop=True)
 
     # If we have uses statements, we'll just add the properties from
     # the grouping specified in each 'uses' statement
-    uses = stmt.search('uses')
-    if len(uses):
-        emit_uses_properties(ctx, stmt, uses, fd, indent+'  ')
+    uses = substmts['uses']
+    if uses:
+        emit_uses_properties(ctx, stmt, uses, fd, depth + 1)
 
     # Next add attributes if necessary
     if has_attributes(stmt):
-        fd.write("%s# TOSCA data types do not support attributes\n"
-                 % (indent)
-                 )
-        fd.write("%s# Enable attributes when converting to a node type\n"
-                 % (indent)
-                 )
-
         fd.write(
-            "%s# attributes:\n"
-            % (indent)
+            f"{indent}# TOSCA data types do not support attributes\n"
+            f"{indent}# Enable attributes when converting to a node type\n"
+            f"{indent}# attributes:\n"
         )
-        emit_properties(ctx, stmt, fd, indent+'  ', prop=False)
+        emit_properties(ctx, stmt, fd, depth + 1, prop=False)
 
     # If we have uses statements, we'll just add the attributes from
     # the grouping specified in each 'uses' statement
-    if len(uses):
-        emit_uses_attributes(ctx, stmt, uses, fd, indent+'  ')
+    if uses:
+        emit_uses_attributes(ctx, stmt, uses, fd, depth + 1)
 
     # Sanity checking. To be removed later
-    handled = [
-        'case',
-        'choice',
-        'container',
-        'description',
-        'if-feature',
-        'leaf',
-        'leaf-list',
-        'list',
-        'reference',
-        'uses',
-        'when'
-    ]
-    check_substmts(stmt, handled)
-
-
-def emit_derived_from(ctx, stmt, fd, indent):
+    check_substmts(stmt, HANDLED_AUGMENTED_TYPE)
+
+
+def emit_derived_from(ctx, stmt, fd, depth):
 
     # Sub-statements for the type statement:
     #
@@ -1045,79 +1132,62 @@ def emit_derived_from(ctx, stmt, fd, indent):
     # require-instance  0..1        
     # type              0..n        
 
-    try:
-        tosca_type = ctx.type_map[stmt.arg]
-    except KeyError:
-        # Not a built-in type. Use type name as is, but strip local
-        # prefix if necessary (since TOSCA doesn't have locally
-        # defined prefixes) and prepend the tosca qualifier
-        tosca_type = create_qualified_name(ctx, stmt.arg)
+    indent = INDENTS[depth]
+    substmts = group_substmts(stmt)
+    tosca_type = get_tosca_type(ctx, stmt.arg)
 
     # We don't have a good way to handle YANG unions. For now, just
     # write out each of the types in the union and fix manually.
     if tosca_type == 'union':
-        fd.write("%s# The YANG type is a union. Select one of the following options:\n"
-                 % (indent))
-        types = stmt.search('type')
-        count = 1
-        for typedef in types:
-            fd.write("%s# Option %d\n"
-                     % (indent, count))
-            emit_derived_from(ctx, typedef, fd, indent)
-            count = count+1
-        fd.write("%s#\n"
-                 % (indent))
+        fd.write(f"{indent}# The YANG type is a union. Select one of the following options:\n")
+        types = substmts['type']
+        for count, typedef in enumerate(types, 1):
+            fd.write(f"{indent}# Option {count}\n")
+            emit_derived_from(ctx, typedef, fd, depth)
+        fd.write(f"{indent}#\n")
     else:
         # Regular type (not a union)
-        fd.write(
-            "%sderived_from: %s\n"
-            % (indent, tosca_type)
-        )
+        fd.write(f"{indent}derived_from: {tosca_type}\n")
         # Emit commented fraction-digits
-        fraction_digits = stmt.search_one("fraction-digits")
+        fraction_digits = first_substmt(substmts, 'fraction-digits')
         if fraction_digits:
-            emit_fraction_digits(ctx, fraction_digits, fd, indent)
-        emit_constraints(ctx, stmt, fd, indent)
+            emit_commented_statement(ctx, fraction_digits, fd, depth)
+        emit_constraints(ctx, stmt, fd, depth, substmts)
 
-    handled = [
-        'enum',
-        'fraction-digits',
-        'length',
-        'range',
-        'pattern',
-        'type'
-    ]
-    check_substmts(stmt, handled)
+    check_substmts(stmt, HANDLED_DERIVED_FROM)
 
 
-def emit_uses_derived_from(ctx, stmt, uses, fd, indent):
+def emit_uses_derived_from(ctx, stmt, uses, fd, depth):
+    indent = INDENTS[depth]
     # TODO: the current code assumes that all grouping names are
     # defined at the top of the module (i.e. without a qualifier). We
     # need to handle the case where groupings are defined at lower
     # levels in the hierarchy, and need to use qualified names
     # instead.
     tosca_type = create_qualified_name(ctx, uses.arg)
-    fd.write(
-        "%sderived_from: %s\n"
-        % (indent, tosca_type)
-    )
+    fd.write(f"{indent}derived_from: {tosca_type}\n")
 
 
 def create_qualified_name(ctx, type_string, qualifier=None):
+    return qualify_name(getattr(ctx, 'local_prefix', None),
+                        type_string, qualifier)
+
+
+@functools.lru_cache(maxsize=None)
+def qualify_name(local_prefix, type_string, qualifier):
+    """Strip the local prefix from a type name and prepend the
+    qualifier if necessary. The same type names are used over and
+    over again, so we cache the results.
+    """
 
     # Separate on first colon
     type_parts = type_string.split(':', 1)
 
     # Do we have a namepace prefix?
     if (len(type_parts) == 2):
-        try:
-            if type_parts[0] != ctx.local_prefix:
-                # prefix doesn't match local prefix. Return
-                # type_string unchanged.
-                return type_string
-        except AttributeError:
-            # No local prefix in context. Return type string
-            # unchanged.
+        if type_parts[0] != local_prefix:
+            # prefix doesn't match local prefix (or there is no local
+            # prefix). Return type_string unchanged.
             return type_string
 
         # We have a localprefix. Strip it.
@@ -1131,49 +1201,96 @@ def create_qualified_name(ctx, type_string, qualifier=None):
     return name
 
 
-def emit_units(ctx, stmt, fd, indent):
-    fd.write(
-        "%s# TOSCA uses scalar unit types\n"
-        % indent
-    )
+def get_tosca_type(ctx, type_name, qualifier=None):
+    """Find the TOSCA type for a YANG type name. The same types are
+    used over and over again, so results are cached in the context.
+    """
+    key = (type_name, qualifier)
+    tosca_type = ctx.tosca_types.get(key)
+    if tosca_type is not None:
+        return tosca_type
+
+    if type_name in ctx.type_map:
+        tosca_type = ctx.type_map[type_name]
+    else:
+        # Not a built-in type. Use type name as is, but strip local
+        # prefix if necessary (since TOSCA doesn't have locally
+        # defined prefixes) and prepend the tosca qualifier
+        tosca_type = create_qualified_name(ctx, type_name, qualifier=qualifier)
+
+    ctx.tosca_types[key] = tosca_type
+    return tosca_type
+
+
+@functools.lru_cache(maxsize=None)
+def to_camel_case(name):
+    """Convert a YANG identifier to camel case. The same identifiers are
+    used over and over again in YANG modules, so we cache the results.
+    """
+    return stringcase.camelcase(name)
+
+
+def get_property_name(ctx, stmt):
+    """Return the name of the TOSCA property definition for this
+    statement, in camel case if requested.
+    """
+    if ctx.opts.camel_case:
+        return to_camel_case(stmt.arg)
+    return stmt.arg
+
+
+def emit_units(ctx, stmt, fd, depth):
+    indent = INDENTS[depth]
     fd.write(
-        "%s# units: %s\n"
-        % (indent, stmt.arg)
+        f"{indent}# TOSCA uses scalar unit types\n"
+        f"{indent}# units: {stmt.arg}\n"
     )
 
 
-def emit_constraints(ctx, stmt, fd, indent):
-    length = stmt.search_one('length')
-    in_range = stmt.search_one('range')
-    pattern = stmt.search('pattern')
-    enum = stmt.search('enum')
-    bits = stmt.search('bit')
-    min_elements = stmt.search_one('min-elements')
-    max_elements = stmt.search_one('max-elements')
-
-    if length or in_range or len(pattern) or len(enum) \
-       or min_elements or max_elements or len(bits):
-        fd.write(
-            "%sconstraints:\n"
-            % indent
-        )
+def emit_constraints(ctx, stmt, fd, depth, substmts=None):
+    indent = INDENTS[depth]
+    # Callers that already grouped the sub-statements can pass them in
+    if substmts is None:
+        substmts = group_substmts(stmt)
+    length = first_substmt(substmts, 'length')
+    in_range = first_substmt(substmts, 'range')
+    pattern = substmts['pattern']
+    enum = substmts['enum']
+    bits = substmts['bit']
+    min_elements = first_substmt(substmts, 'min-elements')
+    max_elements = first_substmt(substmts, 'max-elements')
+
+    if length or in_range or pattern or enum \
+       or min_elements or max_elements or bits:
+        fd.write(f"{indent}constraints:\n")
         if length: 
-            emit_length(ctx, length, fd, indent + '  ')
+            emit_length(ctx, length, fd, depth + 1)
         if in_range: 
-            emit_in_range(ctx, in_range, fd, indent + '  ')
-        if len(pattern):
-            emit_patterns(ctx, pattern, fd, indent + '  ')
-        if len(enum):
-            emit_enums(ctx, enum, fd, indent + '  ')
-        if len(bits):
-            emit_bits(ctx, bits, fd, indent + '  ')
+            emit_in_range(ctx, in_range, fd, depth + 1)
+        if pattern:
+            emit_patterns(ctx, pattern, fd, depth + 1)
+        if enum:
+            emit_enums(ctx, enum, fd, depth + 1)
+        if bits:
+            emit_bits(ctx, bits, fd, depth + 1)
         if min_elements: 
-            emit_min_elements(ctx, min_elements, fd, indent + '  ')
+            emit_min_elements(ctx, min_elements, fd, depth + 1)
         if max_elements: 
-            emit_max_elements(ctx, max_elements, fd, indent + '  ')
+            emit_max_elements(ctx, max_elements, fd, depth + 1)
+
+
+def parse_range_parts(arg):
+    """Parse a YANG range argument into a list of (low, high) tuples.
+    Most arguments specify a single range, which doesn't require
+    findall().
+    """
+    if '|' not in arg:
+        m = re_range_part.search(arg).groups('')
+        return [(m[1], m[6])]
+    return [(m[1], m[6]) for m in re_range_part.findall(arg)]
 
 
-def emit_length(ctx, stmt, fd, indent):
+def emit_length(ctx, stmt, fd, depth):
 
     # Sub-statements for the length statement:
     #
@@ -1182,87 +1299,62 @@ def emit_length(ctx, stmt, fd, indent):
     # error-message  0..1        
     # reference      0..1        
 
-    # Parse length argument. Could include multiple ranges
-    lengths = [(m[1], m[3]) for m in re_length_part.findall(stmt.arg)]
+    indent = INDENTS[depth]
+    parts = []
+    # Parse length argument. Could include multiple ranges, separated
+    # by '|'. The 'high' group is None if a part has a single value.
 
     # Do we have more then one length argument?
-    if len(lengths) > 1:
-        fd.write(
-            "%s# This is not (yet) valid TOSCA. FIX MANUALLY\n"
-            % indent
-        )
-        fd.write(
-            "%s- or:\n"
-            % indent
-        )
-        indent = indent + '  '
-        for (low, high) in lengths:
+    if '|' in stmt.arg:
+        parts.append(f"{indent}# This is not (yet) valid TOSCA. FIX MANUALLY\n")
+        parts.append(f"{indent}- or:\n")
+        depth = depth + 1
+        indent = INDENTS[depth]
+        for m in re_length_part.finditer(stmt.arg):
+            (low, high) = m.group(2, 4)
             if high:
                 if not low == 'min' and not high == 'max':
-                    fd.write(
-                        "%s- and:\n"
-                        % indent
-                    )
-                    indent = indent + '  '
+                    parts.append(f"{indent}- and:\n")
+                    depth = depth + 1
+                    indent = INDENTS[depth]
                 if not low == 'min':
-                    fd.write(
-                        "%s- min_length: %s\n"
-                        % (indent, low)
-                    )
+                    parts.append(f"{indent}- min_length: {low}\n")
                 if not high == 'max':
-                    fd.write(
-                        "%s- max_length: %s\n"
-                        % (indent, high)
-                    )
+                    parts.append(f"{indent}- max_length: {high}\n")
             else:
                 if not low == 'max':
-                    fd.write(
-                        "%s- max_length: %s\n"
-                        % (indent, low)
-                    )
+                    parts.append(f"{indent}- max_length: {low}\n")
     else:
-        (low, high) = lengths[0]
+        (low, high) = re_length_part.search(stmt.arg).group(2, 4)
         if high:
             if not low == 'min':
-                fd.write(
-                    "%s- min_length: %s\n"
-                    % (indent, low)
-                )
+                parts.append(f"{indent}- min_length: {low}\n")
             if not high == 'max':
-                fd.write(
-                    "%s- max_length: %s\n"
-                    % (indent, high)
-                )
+                parts.append(f"{indent}- max_length: {high}\n")
         else:
             if not low == 'max':
-                fd.write(
-                    "%s- max_length: %s\n"
-                    % (indent, low)
-                )
+                parts.append(f"{indent}- max_length: {low}\n")
+
+    fd.write("".join(parts))
 
-    handled = []
-    check_substmts(stmt, handled)
+    check_substmts(stmt, NO_SUBSTMTS)
 
 
-def emit_min_elements(ctx, stmt, fd, indent):
+def emit_min_elements(ctx, stmt, fd, depth):
     # Sub-statements for the module statement:
     #
-    fd.write(
-        "%s- min_length: %s\n"
-        % (indent, stmt.arg)
-    )
+    indent = INDENTS[depth]
+    fd.write(f"{indent}- min_length: {stmt.arg}\n")
 
 
-def emit_max_elements(ctx, stmt, fd, indent):
+def emit_max_elements(ctx, stmt, fd, depth):
     # Sub-statements for the module statement:
     #
-    fd.write(
-        "%s- max_length: %s\n"
-        % (indent, stmt.arg)
-    )
+    indent = INDENTS[depth]
+    fd.write(f"{indent}- max_length: {stmt.arg}\n")
 
 
-def emit_in_range(ctx, stmt, fd, indent):
+def emit_in_range(ctx, stmt, fd, depth):
 
     # Sub-statements for the range statement:
     #
@@ -1271,8 +1363,10 @@ def emit_in_range(ctx, stmt, fd, indent):
     # error-message  0..1        
     # reference      0..1        
 
+    indent = INDENTS[depth]
+    parts = []
     # Parse range argument. Could include multiple ranges
-    ranges = [(m[1], m[6]) for m in re_range_part.findall(stmt.arg)]
+    ranges = parse_range_parts(stmt.arg)
 
     # YANG range could be list of valid values. Check first to see
     # how many of each we have.
@@ -1289,28 +1383,18 @@ def emit_in_range(ctx, stmt, fd, indent):
     # Do we have both valid values and ranges, or do we have more than
     # one range argument?
     if (num_valid_values and num_ranges) or (num_ranges > 1):
-        fd.write(
-            "%s# This is not (yet) valid TOSCA. FIX MANUALLY\n"
-            % indent
-        )
-        fd.write(
-            "%s- or:\n"
-            % indent
-        )
-        indent = indent + '  '
+        parts.append(f"{indent}# This is not (yet) valid TOSCA. FIX MANUALLY\n")
+        parts.append(f"{indent}- or:\n")
+        depth = depth + 1
+        indent = INDENTS[depth]
 
     # Write valid values:
     if num_valid_values:
-        fd.write(
-            "%s- valid_values:\n"
-            % (indent)
-        )
+        parts.append(f"{indent}- valid_values:\n")
+        value_indent = INDENTS[depth + 1]
         for (low, high) in ranges:
             if not high:
-                fd.write(
-                    "%s- %s\n"
-                    % (indent + '  ', str(low))
-            )
+                parts.append(f"{value_indent}- {low}\n")
         
     # Write ranges
     if num_ranges:
@@ -1319,22 +1403,19 @@ def emit_in_range(ctx, stmt, fd, indent):
                 # Update values
                 if low == 'min': low = 'UNBOUNDED'
                 if high == 'max': high = 'UNBOUNDED'
-                fd.write(
-                    "%s- in_range: [%s, %s]\n"
-                    % (indent, low, high)
-                )
+                parts.append(f"{indent}- in_range: [{low}, {high}]\n")
 
     # All done
-    handled = []
-    check_substmts(stmt, handled)
+    fd.write("".join(parts))
+    check_substmts(stmt, NO_SUBSTMTS)
 
 
-def emit_patterns(ctx, stmt, fd, indent):
+def emit_patterns(ctx, stmt, fd, depth):
     for pattern in stmt:
-        emit_pattern(ctx, pattern, fd, indent)
+        emit_pattern(ctx, pattern, fd, depth)
 
 
-def emit_pattern(ctx, stmt, fd, indent):
+def emit_pattern(ctx, stmt, fd, depth):
 
     # Sub-statements for the range statement:
     #
@@ -1343,24 +1424,19 @@ def emit_pattern(ctx, stmt, fd, indent):
     # error-message  0..1        
     # modifier       0..1        
     # reference      0..1        
-    fd.write(
-        "%s- pattern: '%s'\n"
-        % (indent, stmt.arg)
-    )
-    handled = []
-    check_substmts(stmt, handled)
+    indent = INDENTS[depth]
+    fd.write(f"{indent}- pattern: '{stmt.arg}'\n")
+    check_substmts(stmt, NO_SUBSTMTS)
 
 
-def emit_enums(ctx, stmt, fd, indent):
-    fd.write(
-        "%s- valid_values:\n"
-        % indent
-    )
-    indent = indent + '  '
+def emit_enums(ctx, stmt, fd, depth):
+    indent = INDENTS[depth]
+    fd.write(f"{indent}- valid_values:\n")
+    depth = depth + 1
     for enum in stmt:
-        emit_enum(ctx, enum, fd, indent)
+        emit_enum(ctx, enum, fd, depth)
 
-def emit_enum(ctx, stmt, fd, indent):
+def emit_enum(ctx, stmt, fd, depth):
 
     # Sub-statements for the enum statement:
     #
@@ -1369,6 +1445,7 @@ def emit_enum(ctx, stmt, fd, indent):
     # reference     0..1        
     # status        0..1        
     # value         0..1        
+    indent = INDENTS[depth]
     value = stmt.search_one('value')
     description = stmt.search_one('description')
     if must_escape(stmt.arg):
@@ -1376,37 +1453,23 @@ def emit_enum(ctx, stmt, fd, indent):
     else:
         enum = stmt.arg
     if value:
-        fd.write(
-            "%s- %s  # Value: %s\n"
-            % (indent, enum, value.arg)
-        )
+        fd.write(f"{indent}- {enum}  # Value: {value.arg}\n")
     else:
-        fd.write(
-            "%s- %s\n"
-            % (indent, enum)
-        )
+        fd.write(f"{indent}- {enum}\n")
     if description:
-        lines = wrap_text(description.arg)
-        for line in lines:
-            fd.write(
-                "%s  # %s\n"
-                % (indent, line)
-        )
+        fd.write(format_comment(description, depth + 1))
 
-    handled = ['value', 'description']
-    check_substmts(stmt, handled)
+    check_substmts(stmt, HANDLED_ENUM)
 
 
-def emit_bits(ctx, stmt, fd, indent):
-    fd.write(
-        "%s- valid_values:\n"
-        % indent
-    )
-    indent = indent + '  '
+def emit_bits(ctx, stmt, fd, depth):
+    indent = INDENTS[depth]
+    fd.write(f"{indent}- valid_values:\n")
+    depth = depth + 1
     for bit in stmt:
-        emit_bit(ctx, bit, fd, indent)
+        emit_bit(ctx, bit, fd, depth)
 
-def emit_bit(ctx, stmt, fd, indent):
+def emit_bit(ctx, stmt, fd, depth):
     # Sub-statements for the bit statement:
     #
     # description   0..1        
@@ -1414,54 +1477,48 @@ def emit_bit(ctx, stmt, fd, indent):
     # position      0..1        
     # reference     0..1        
     # status        0..1        
+    indent = INDENTS[depth]
     description = stmt.search_one('description')
     if must_escape(stmt.arg):
         bit = "'" + stmt.arg + "'"
     else:
         bit = stmt.arg
-    fd.write(
-        "%s- %s\n"
-        % (indent, bit)
-    )
+    fd.write(f"{indent}- {bit}\n")
     if description:
-        lines = wrap_text(description.arg)
-        for line in lines:
-            fd.write(
-                "%s  # %s\n"
-                % (indent, line)
-        )
+        fd.write(format_comment(description, depth + 1))
 
-    handled = ['description']
-    check_substmts(stmt, handled)
+    check_substmts(stmt, HANDLED_BIT)
+
+
+@functools.lru_cache(maxsize=1)
+def get_timestamp_regexp():
+    return re.compile(timestamp_str, re.X)
 
 
 def must_escape(s):
-    # Must escape if string represents integer
-    try:
-        int(s)
+    # Must escape if string is boolean or null
+    if s in YAML_RESERVED_WORDS:
         return True
-    except ValueError:
-        pass
-    # Must escape if string represents float
-    try:
-        float(s)
+    # Must escape if string represents a number. Most enum and bit
+    # names are plain words, so check for the common cases before
+    # falling back on float() (which also accepts anything int()
+    # accepts).
+    digits = s[1:] if s[:1] in ('+', '-') else s
+    if digits.isdecimal():
         return True
-    except ValueError:
-        pass
-    # Must escape if string represents long
-    try:
-        int(s)
-        return True
-    except ValueError:
-        pass
-    # Must escape if string is boolean
-    if s == 'true' or s == 'false':
-        return True
-    # Must escape if string is null
-    if s == 'null' or s == '~':
+    word = s.strip().lower()
+    if word[:1] in ('+', '-'):
+        word = word[1:]
+    if word in FLOAT_WORDS:
         return True
+    if re_digit.search(s):
+        try:
+            float(s)
+            return True
+        except ValueError:
+            pass
     # Must escape if string represents date
-    if timestamp_regexp.match(s):
+    if get_timestamp_regexp().match(s):
         return True
     # No need to escape
     return False
@@ -1472,76 +1529,110 @@ def must_escape(s):
 #########################################################################    
 
 
-def has_properties(stmt):
-    """Check to see if this statement defines its own properties"""
+def classify_properties(stmt):
+    """Split the substatements of this statement that define properties
+    into a list of property definitions and a list of attribute
+    definitions (marked using "config false" in YANG). This requires
+    only a single pass over the substatements. Groupings are emitted
+    for every statement that uses them, so the result is cached on
+    the statement.
+    """
+    try:
+        return stmt.i_tosca_properties
+    except AttributeError:
+        pass
 
-    # First, check local property definitions
+    props = []
+    attrs = []
     for sub in stmt.substmts:
-        if sub.keyword in ['leaf','leaf-list','list','container','choice','augment'] and \
-           not is_attribute(sub): return True
+        if sub.keyword in PROPERTY_KEYWORDS:
+            if is_attribute(sub):
+                attrs.append(sub)
+            else:
+                props.append(sub)
+    stmt.i_tosca_properties = (props, attrs)
+    return stmt.i_tosca_properties
 
-    # Then, check 'uses' substatements
-    usess = stmt.search('uses')
-    if len(usess) > 1:
-        for uses in usess[1:]:
-            grouping = uses.i_grouping
-            if grouping and has_properties(grouping):
-                return True
-    return False
+
+def has_properties(stmt):
+    """Check to see if this statement defines its own properties"""
+    return get_property_flags(stmt)[0]
 
 
 def has_attributes(stmt):
     """Check to see if this statement defines its own attributes"""
+    return get_property_flags(stmt)[1]
 
-    # First, check local attribute definitions
-    for sub in stmt.substmts:
-        if sub.keyword in ['leaf','leaf-list','list','container','choice','augment'] and \
-           is_attribute(sub): return True
+
+def get_property_flags(stmt):
+    """Return a (has_properties, has_attributes) tuple for this
+    statement. The same groupings are checked for every statement
+    that uses them, so the result is cached on the statement.
+    """
+    try:
+        return stmt.i_tosca_property_flags
+    except AttributeError:
+        pass
+
+    # First, check local property and attribute definitions
+    (props, attrs) = classify_properties(stmt)
+    has_props = bool(props)
+    has_attrs = bool(attrs)
 
     # Then, check 'uses' substatements
-    usess = stmt.search('uses')
-    if len(usess) > 1:
-        for uses in usess[1:]:
-            grouping = uses.i_grouping
-            if grouping and has_attributes(grouping):
-                return True
-            
-    return False
+    for uses in stmt.search('uses')[1:]:
+        grouping = uses.i_grouping
+        if grouping:
+            (grouping_props, grouping_attrs) = get_property_flags(grouping)
+            has_props = has_props or grouping_props
+            has_attrs = has_attrs or grouping_attrs
 
+    stmt.i_tosca_property_flags = (has_props, has_attrs)
+    return stmt.i_tosca_property_flags
 
-def emit_properties(ctx, stmt, fd, indent, prop=True, qualifier=None):
 
-    # Try to maintain the order in which properties are defined by
-    # iterating over list of sub-statements
-    for sub in stmt.substmts:
-        if sub.keyword == 'leaf':
-            emit_leaf(ctx, sub, fd, indent, prop=prop, qualifier=qualifier)
-        elif sub.keyword == 'leaf-list':
-            emit_leaf_list(ctx, sub, fd, indent, prop=prop, qualifier=qualifier)
-        elif sub.keyword == 'list':
-            emit_list(ctx, sub, fd, indent, prop=prop, qualifier=qualifier)
-        elif sub.keyword == 'container':
-            emit_container(ctx, sub, fd, indent, prop=prop, qualifier=qualifier)
-        elif sub.keyword == 'choice':
-            emit_choice(ctx, sub, fd, indent, prop=prop, qualifier=qualifier)
-        elif sub.keyword == 'augment':
-            emit_augment(ctx, sub, fd, indent, prop=prop, qualifier=qualifier)
-        else:
-            # This statement does not define a property
-            pass
+def emit_properties(ctx, stmt, fd, depth, prop=True, qualifier=None):
+
+    # The property and attribute definitions are kept in the order in
+    # which they are defined in the list of sub-statements
+    (props, attrs) = classify_properties(stmt)
+    subs = props if prop else attrs
+    emit_property_definitions(ctx, subs, fd, depth, prop=prop, qualifier=qualifier)
+
+
+def emit_property_definitions(ctx, subs, fd, depth, prop=True, qualifier=None):
+    """Emit definitions for statements that have already been classified
+    as properties (prop=True) or as attributes (prop=False) by
+    classify_properties.
+    """
+    for sub in subs:
+        emitter = PROPERTY_EMITTERS[sub.keyword]
+        emitter(ctx, sub, fd, depth, prop=prop, qualifier=qualifier)
 
 
-def emit_uses_properties(ctx, stmt, uses, fd, indent):
+def emit_uses_properties(ctx, stmt, uses, fd, depth):
     for use in uses:
-        emit_use(ctx, stmt, use, fd, indent, prop=True)
+        emit_use(ctx, stmt, use, fd, depth, prop=True)
 
 
-def emit_uses_attributes(ctx, stmt, uses, fd, indent):
+def emit_uses_attributes(ctx, stmt, uses, fd, depth):
     for use in uses:
-        emit_use(ctx, stmt, use, fd, indent, prop=False)
+        emit_use(ctx, stmt, use, fd, depth, prop=False)
 
 
-def emit_use(ctx, stmt, use, fd, indent, prop=True):
+@functools.lru_cache(maxsize=None)
+def get_foreign_prefix(local_prefix, name):
+    """Return the namespace prefix of a name if it has one that doesn't
+    match the local prefix (or if there is no local prefix). Return
+    None otherwise.
+    """
+    (prefix, colon, _) = name.partition(':')
+    if colon and prefix != local_prefix:
+        return prefix
+    return None
+
+
+def emit_use(ctx, stmt, use, fd, depth, prop=True):
     # Sub-statements for the uses statement:
     #
     # augment       0..n        
@@ -1552,9 +1643,10 @@ def emit_use(ctx, stmt, use, fd, indent, prop=True):
     # status        0..1        
     # when          0..1        
 
+    indent = INDENTS[depth]
     grouping = use.i_grouping
     if not grouping:
-        print("%s: uses(%s) not found" % (statements.mk_path_str(stmt, True), use.arg) )
+        print(f"{statements.mk_path_str(stmt, True)}: uses({use.arg}) not found")
         return
 
     if (prop and not has_properties(grouping)) or \
@@ -1564,35 +1656,16 @@ def emit_use(ctx, stmt, use, fd, indent, prop=True):
 
     # Just emit the properties in this grouping. Prepend namespace
     # prefix  if necessary
-    prefix = None
-    type_parts = use.arg.split(':', 1)
-    if (len(type_parts) == 2):
-        # The name has a namespace prefix
-        try:
-            if type_parts[0] != ctx.local_prefix:
-                # Prefix doesn't match local prefix. OK to use the
-                # prefix in the name.
-                prefix = type_parts[0]
-        except AttributeError:
-            # No local prefix in context. OK to use the prefix in the
-            # name.
-            prefix = type_parts[0]
-    
+    prefix = get_foreign_prefix(getattr(ctx, 'local_prefix', None), use.arg)
 
     # Keep track of the grouping from which these properties were
     # copied.
-    fd.write(
-        "%s# %s from '%s'\n"
-        % (indent, "properties" if prop else "attributes", use.arg)
-    )
+    fd.write(f"{indent}# {'properties' if prop else 'attributes'} from '{use.arg}'\n")
     if_feature = use.search_one('if-feature')
     if if_feature:
-        fd.write(
-            "%s# Used only if the '%s' feature is enabled\n"
-            % (indent, if_feature.arg)
-    )
+        fd.write(f"{indent}# Used only if the '{if_feature.arg}' feature is enabled\n")
     # Write property definitions
-    emit_properties(ctx, use.i_grouping, fd, indent, prop=prop, qualifier=prefix)
+    emit_properties(ctx, use.i_grouping, fd, depth, prop=prop, qualifier=prefix)
         
 
 def is_attribute(stmt):
@@ -1603,7 +1676,7 @@ def is_attribute(stmt):
     return (config != None) and (config.arg=='false')
 
 
-def emit_leaf(ctx, stmt, fd, indent, prop=True, qualifier=None):
+def emit_leaf(ctx, stmt, fd, depth, prop=True, qualifier=None):
     # Sub-statements for the leaf statement:
     #
     # config        0..1        
@@ -1618,102 +1691,83 @@ def emit_leaf(ctx, stmt, fd, indent, prop=True, qualifier=None):
     # units         0..1        
     # when          0..1        
 
-    # Check if property or attribute
-    is_attr = is_attribute(stmt)
-    if is_attr == prop: return
+    indent = INDENTS[depth]
+    # Sub-statements used below
+    substmts = group_substmts(stmt)
 
     # Get name
-    if ctx.opts.camel_case:
-        name = stringcase.camelcase(stmt.arg)
-    else:
-        name = stmt.arg
+    name = get_property_name(ctx, stmt)
 
-    fd.write(
-        "%s%s:\n"
-        % (indent, name)
-    )
-    indent = indent + '  '
-    description = stmt.search_one('description')
+    fd.write(f"{indent}{name}:\n")
+    depth = depth + 1
+    description = first_substmt(substmts, 'description')
     if description:
-        emit_description(ctx, description, fd, indent)
-    emit_metadata(ctx, stmt, fd, indent)
-    type = stmt.search_one('type')
+        emit_description(ctx, description, fd, depth)
+    emit_metadata(ctx, stmt, fd, depth)
+    type = first_substmt(substmts, 'type')
     if type:
-        emit_type(ctx, type, fd, indent, qualifier=qualifier)
-    if not is_attr:
-        mandatory = stmt.search_one('mandatory')
-        emit_mandatory(ctx, mandatory, fd, indent)
-    default = stmt.search_one('default')
+        emit_type(ctx, type, fd, depth, qualifier=qualifier)
+    if prop:
+        mandatory = first_substmt(substmts, 'mandatory')
+        emit_mandatory(ctx, mandatory, fd, depth)
+    default = first_substmt(substmts, 'default')
     if default:
-        emit_default(ctx, default, fd, indent)
-    units = stmt.search_one('units')
+        emit_default(ctx, default, fd, depth)
+    units = first_substmt(substmts, 'units')
     if units:
-        emit_units(ctx, units, fd, indent)
-    when = stmt.search_one('when')
+        emit_units(ctx, units, fd, depth)
+    when = first_substmt(substmts, 'when')
     if when:
-        emit_when(ctx, when, fd, indent)
-    must = stmt.search_one('must')
+        emit_when(ctx, when, fd, depth)
+    must = first_substmt(substmts, 'must')
     if must:
-        emit_must(ctx, must, fd, indent)
+        emit_must(ctx, must, fd, depth)
 
-    handled = ['reference', 'description', 'type', 'units', 'config',
-               'mandatory', 'default', 'must', 'when' ]
-    check_substmts(stmt, handled)
+    check_substmts(stmt, HANDLED_LEAF)
 
 
-def emit_mandatory(ctx, stmt, fd, indent):
+def emit_mandatory(ctx, stmt, fd, depth):
 
+    indent = INDENTS[depth]
     if stmt:
         required = stmt.arg
     else:
         required = 'false'
-    fd.write(
-        "%srequired: %s\n"
-        % (indent, required)
-    )
+    fd.write(f"{indent}required: {required}\n")
 
 
-def emit_default(ctx, stmt, fd, indent):
-    fd.write(
-        "%sdefault: %s\n"
-        % (indent, stmt.arg)
-    )
+def emit_default(ctx, stmt, fd, depth):
+    indent = INDENTS[depth]
+    fd.write(f"{indent}default: {stmt.arg}\n")
 
-def emit_commented_default(ctx, stmt, fd, indent):
+def emit_commented_default(ctx, stmt, fd, depth):
+    indent = INDENTS[depth]
     fd.write(
-        "%s# TOSCA doesn't support 'default' here\n%s# default: %s\n"
-        % (indent, indent, stmt.arg)
+        f"{indent}# TOSCA doesn't support 'default' here\n"
+        f"{indent}# default: {stmt.arg}\n"
     )
 
-def emit_when(ctx, stmt, fd, indent):
-    fd.write(
-        "%s# when: %s\n"
-        % (indent, stmt.arg)
-    )
+def emit_when(ctx, stmt, fd, depth):
+    indent = INDENTS[depth]
+    fd.write(f"{indent}# when: {stmt.arg}\n")
 
-def emit_must(ctx, stmt, fd, indent):
+def emit_must(ctx, stmt, fd, depth):
     # Sub-statements for the must statement:
     #
     # description    0..1        
     # error-app-tag  0..1        
     # error-message  0..1        
     # reference      0..1        
-    fd.write(
-        "%s# must:\n%s#   %s\n"
-        % (indent, indent, stmt.arg)
-    )
+    indent = INDENTS[depth]
+    fd.write(f"{indent}# must:\n{indent}#   {stmt.arg}\n")
     error_message = stmt.search_one('error-message')
     if error_message:
-        fd.write(
-            "%s#   error-message: %s\n"
-            % (indent, error_message.arg)
-        )
+        fd.write(f"{indent}#   error-message: {error_message.arg}\n")
 
-    handled = ['error-message']
-    check_substmts(stmt, handled)
+    check_substmts(stmt, HANDLED_MUST)
 
 
-def emit_leaf_list(ctx, stmt, fd, indent, prop=True, qualifier=None):
+def emit_leaf_list(ctx, stmt, fd, depth, prop=True, qualifier=None):
     # Sub-statements for the leaf-list statement:
     #
     # config        0..1        
@@ -1730,51 +1784,39 @@ def emit_leaf_list(ctx, stmt, fd, indent, prop=True, qualifier=None):
     # units         0..1        
     # when          0..1        
 
-    # Check if property or attribute
-    if is_attribute(stmt) == prop: return
+    indent = INDENTS[depth]
+    # Sub-statements used below
+    substmts = group_substmts(stmt)
 
-    if ctx.opts.camel_case:
-        name = stringcase.camelcase(stmt.arg)
-    else:
-        name = stmt.arg
-    fd.write(
-        "%s%s:\n"
-        % (indent, name)
-    )
-    indent = indent + '  '
+    name = get_property_name(ctx, stmt)
+    fd.write(f"{indent}{name}:\n")
+    depth = depth + 1
+    indent = INDENTS[depth]
 
-    description = stmt.search_one('description')
+    description = first_substmt(substmts, 'description')
     if description:
-        emit_description(ctx, description, fd, indent)
-    emit_metadata(ctx, stmt, fd, indent)
-    fd.write(
-        "%stype: list\n"
-        % (indent)
-    )
-    type = stmt.search_one('type')
+        emit_description(ctx, description, fd, depth)
+    emit_metadata(ctx, stmt, fd, depth)
+    fd.write(f"{indent}type: list\n")
+    type = first_substmt(substmts, 'type')
     if type:
-        fd.write(
-            "%sentry_schema:\n"
-            % (indent)
-        )
-        emit_type(ctx, type, fd, indent + '  ', qualifier=qualifier)
-    units = stmt.search_one('units')
+        fd.write(f"{indent}entry_schema:\n")
+        emit_type(ctx, type, fd, depth + 1, qualifier=qualifier)
+    units = first_substmt(substmts, 'units')
     if units:
-        emit_units(ctx, units, fd, indent)
-    emit_constraints(ctx, stmt, fd, indent)
-    when = stmt.search_one('when')
+        emit_units(ctx, units, fd, depth)
+    emit_constraints(ctx, stmt, fd, depth, substmts)
+    when = first_substmt(substmts, 'when')
     if when:
-        emit_when(ctx, when, fd, indent)
-    must = stmt.search_one('must')
+        emit_when(ctx, when, fd, depth)
+    must = first_substmt(substmts, 'must')
     if must:
-        emit_must(ctx, must, fd, indent)
+        emit_must(ctx, must, fd, depth)
 
-    handled = ['reference', 'description', 'type', 'units', 'config',
-               'min-elements', 'max-elements', 'must', 'when']
-    check_substmts(stmt, handled)
+    check_substmts(stmt, HANDLED_LEAF_LIST)
 
 
-def emit_list(ctx, stmt, fd, indent, prop=True, qualifier=None):
+def emit_list(ctx, stmt, fd, depth, prop=True, qualifier=None):
 
     # Sub-statements for the list statement:
     #
@@ -1803,8 +1845,9 @@ def emit_list(ctx, stmt, fd, indent, prop=True, qualifier=None):
     # uses          0..n        
     # when          0..1        
 
-    # Check if property or attribute
-    if is_attribute(stmt) == prop: return
+    indent = INDENTS[depth]
+    # Sub-statements used below
+    substmts = group_substmts(stmt)
 
     # Find qualified entry schema for this container. If the container
     # statement has a single 'uses' statement only, we use the name of
@@ -1816,69 +1859,51 @@ def emit_list(ctx, stmt, fd, indent, prop=True, qualifier=None):
     if qualifier:
         entry_schema = qualifier + ':' + entry_schema
 
-    if ctx.opts.camel_case:
-        name = stringcase.camelcase(stmt.arg)
-    else:
-        name = stmt.arg
-    fd.write(
-        "%s%s:\n"
-        % (indent, name)
-    )
-    indent = indent + '  '
-    description = stmt.search_one('description')
+    name = get_property_name(ctx, stmt)
+    fd.write(f"{indent}{name}:\n")
+    depth = depth + 1
+    indent = INDENTS[depth]
+    description = first_substmt(substmts, 'description')
     if description:
-        emit_description(ctx, description, fd, indent)
-    emit_metadata(ctx, stmt, fd, indent)
+        emit_description(ctx, description, fd, depth)
+    emit_metadata(ctx, stmt, fd, depth)
     fd.write(
-        "%stype: list\n"
-        % (indent)
+        f"{indent}type: list\n"
+        f"{indent}entry_schema: {entry_schema}\n"
     )
-    fd.write(
-        "%sentry_schema: %s\n"
-        % (indent, entry_schema)
-    )
-    emit_constraints(ctx, stmt, fd, indent)
+    emit_constraints(ctx, stmt, fd, depth, substmts)
     # Emit commented key
-    key = stmt.search_one('key')
+    key = first_substmt(substmts, 'key')
     if key:
-        emit_key(ctx, key, fd, indent)
+        emit_key(ctx, key, fd, depth)
     # Emit commented unique
-    unique = stmt.search_one('unique')
+    unique = first_substmt(substmts, 'unique')
     if unique:
-        emit_unique(ctx, unique, fd, indent)
+        emit_commented_statement(ctx, unique, fd, depth)
     # Emit commented ordered_by
-    ordered_by = stmt.search_one('ordered-by')
+    ordered_by = first_substmt(substmts, 'ordered-by')
     if ordered_by:
-        emit_ordered_by(ctx, ordered_by, fd, indent)
+        emit_ordered_by(ctx, ordered_by, fd, depth)
 
-    handled = ['reference', 'description', 'config', 'ordered-by',
-               'typedef', 'container', 'grouping', 'list', 'uses', 'key', 'unique',
-               'leaf', 'leaf-list', 'min-elements', 'max-elements', 'when', 'must']
-    check_substmts(stmt, handled)
+    check_substmts(stmt, HANDLED_LIST)
 
 
-def emit_if_feature(ctx, stmt, fd, indent):
-    fd.write(
-        "%s# if-feature: %s\n"
-        % (indent, stmt.arg)
-    )
+def emit_if_feature(ctx, stmt, fd, depth):
+    indent = INDENTS[depth]
+    fd.write(f"{indent}# if-feature: {stmt.arg}\n")
 
 
-def emit_key(ctx, stmt, fd, indent):
-    fd.write(
-        "%s# key: %s\n"
-        % (indent, stmt.arg)
-    )
+def emit_key(ctx, stmt, fd, depth):
+    indent = INDENTS[depth]
+    fd.write(f"{indent}# key: {stmt.arg}\n")
 
 
-def emit_ordered_by(ctx, stmt, fd, indent):
-    fd.write(
-        "%s# ordered-by: %s\n"
-        % (indent, stmt.arg)
-    )
+def emit_ordered_by(ctx, stmt, fd, depth):
+    indent = INDENTS[depth]
+    fd.write(f"{indent}# ordered-by: {stmt.arg}\n")
 
 
-def emit_container(ctx, stmt, fd, indent, prop=True, qualifier=None):
+def emit_container(ctx, stmt, fd, depth, prop=True, qualifier=None):
 
     # Sub-statements for the container statement:
     #
@@ -1903,8 +1928,9 @@ def emit_container(ctx, stmt, fd, indent, prop=True, qualifier=None):
     # uses          0..n        
     # when          0..1        
 
-    # Check if property or attribute
-    if is_attribute(stmt) == prop: return
+    indent = INDENTS[depth]
+    # Sub-statements used below
+    substmts = group_substmts(stmt)
 
     # Find qualified type name for this container. If the container
     # statement has a single 'uses' statement only, we use the name of
@@ -1917,37 +1943,26 @@ def emit_container(ctx, stmt, fd, indent, prop=True, qualifier=None):
         type_name = qualifier + ':' + type_name
 
     # Property name
-    if ctx.opts.camel_case:
-        name = stringcase.camelcase(stmt.arg)
-    else:
-        name = stmt.arg
-    fd.write(
-        "%s%s:\n"
-        % (indent, name)
-    )
-    indent = indent + '  '
-    description = stmt.search_one('description')
+    name = get_property_name(ctx, stmt)
+    fd.write(f"{indent}{name}:\n")
+    depth = depth + 1
+    indent = INDENTS[depth]
+    description = first_substmt(substmts, 'description')
     if description:
-        emit_description(ctx, description, fd, indent)
-    emit_metadata(ctx, stmt, fd, indent)
-    fd.write(
-        "%stype: %s\n"
-        % (indent, type_name)
-    )
-    must = stmt.search_one('must')
+        emit_description(ctx, description, fd, depth)
+    emit_metadata(ctx, stmt, fd, depth)
+    fd.write(f"{indent}type: {type_name}\n")
+    must = first_substmt(substmts, 'must')
     if must:
-        emit_must(ctx, must, fd, indent)
-    presence = stmt.search_one('presence')
+        emit_must(ctx, must, fd, depth)
+    presence = first_substmt(substmts, 'presence')
     if presence:
-        emit_presence(ctx, presence, fd, indent)
+        emit_commented_statement(ctx, presence, fd, depth)
 
-    handled = ['reference', 'description', 'config', 'presence',
-               'typedef', 'container', 'grouping', 'list', 'uses',
-               'leaf', 'leaf-list', 'when', 'must']
-    check_substmts(stmt, handled)
+    check_substmts(stmt, HANDLED_CONTAINER)
 
 
-def emit_choice(ctx, stmt, fd, indent, prop=True, qualifier=None):
+def emit_choice(ctx, stmt, fd, depth, prop=True, qualifier=None):
     # Sub-statements for the choice statement:
     #
     # anydata       0..n        
@@ -1967,89 +1982,67 @@ def emit_choice(ctx, stmt, fd, indent, prop=True, qualifier=None):
     # status        0..1        
     # when          0..1        
 
-    # Check if property or attribute
-    is_attr = is_attribute(stmt)
-    if is_attr == prop: return
+    indent = INDENTS[depth]
+    # Sub-statements used below
+    substmts = group_substmts(stmt)
 
     # Get list of cases or list of leafs. If we have a list of leafs,
     # each leaf is equivalate to a case with a single leaf node.
-    cases = stmt.search('case')
-    leafs = stmt.search('leaf')
-    if len(cases):
+    cases = substmts['case']
+    leafs = substmts['leaf']
+    if cases:
         options = cases
-    elif len(leafs):
+    elif leafs:
         options = leafs
     else:
         options = list()
 
     # Define a property for the choice
-    if ctx.opts.camel_case:
-        name = stringcase.camelcase(stmt.arg)
-    else:
-        name = stmt.arg
-    fd.write(
-        "%s%s:\n"
-        % (indent, name)
-    )
-    orig_indent = indent
-    indent = indent + '  '
-    description = stmt.search_one('description')
+    name = get_property_name(ctx, stmt)
+    fd.write(f"{indent}{name}:\n")
+    orig_depth = depth
+    depth = depth + 1
+    indent = INDENTS[depth]
+    description = first_substmt(substmts, 'description')
     if description:
-        emit_description(ctx, description, fd, indent)
+        emit_description(ctx, description, fd, depth)
     # Choices are always strings
-    fd.write(
-        "%stype: string\n"
-        % (indent)
-    )
-    if not is_attr:
-        mandatory = stmt.search_one('mandatory')
-        emit_mandatory(ctx, mandatory, fd, indent)
-    default = stmt.search_one('default')
+    fd.write(f"{indent}type: string\n")
+    if prop:
+        mandatory = first_substmt(substmts, 'mandatory')
+        emit_mandatory(ctx, mandatory, fd, depth)
+    default = first_substmt(substmts, 'default')
     if default:
-        emit_default(ctx, default, fd, indent)
+        emit_default(ctx, default, fd, depth)
     # Write valid values
-    fd.write(
-        "%sconstraints:\n"
-        % (indent)
-    )
-    indent = indent + '  '
-    fd.write(
-        "%s- valid_values:\n"
-        % (indent)
-    )
-    indent = indent + '  '
+    parts = [f"{indent}constraints:\n"]
+    depth = depth + 1
+    indent = INDENTS[depth]
+    parts.append(f"{indent}- valid_values:\n")
+    depth = depth + 1
+    indent = INDENTS[depth]
     for option in options:
-        fd.write(
-            "%s- %s\n"
-            % (indent, option.arg)
-        )
+        parts.append(f"{indent}- {option.arg}\n")
         
     # Define properties for each of the options.
-    indent = orig_indent
-    fd.write(
-        "%s# Select one of the following options\n%s#\n"
-        % (indent, indent)
-    )
+    depth = orig_depth
+    indent = INDENTS[depth]
+    parts.append(f"{indent}# Select one of the following options\n{indent}#\n")
+    fd.write("".join(parts))
     for case in cases:
-        emit_case(ctx, case, fd, indent, qualifier=qualifier)
+        emit_case(ctx, case, fd, depth, qualifier=qualifier)
     # Emit leafs if we don't have an explicit list of cases
     for leaf in leafs:
         # Add descriptive commentary 
-        fd.write(
-            "%s# The following properties are used in case of '%s'\n"
-            % (indent, leaf.arg)
-        )
-        emit_leaf(ctx, leaf, fd, indent, qualifier=qualifier)
-    fd.write(
-        "%s# End of options\n%s#\n"
-        % (indent, indent)
-    )
+        fd.write(f"{indent}# The following properties are used in case of '{leaf.arg}'\n")
+        if not is_attribute(leaf):
+            emit_leaf(ctx, leaf, fd, depth, qualifier=qualifier)
+    fd.write(f"{indent}# End of options\n{indent}#\n")
 
-    handled = ['case', 'config', 'default', 'description', 'leaf', 'mandatory' ]
-    check_substmts(stmt, handled)
+    check_substmts(stmt, HANDLED_CHOICE)
 
 
-def emit_case(ctx, stmt, fd, indent, qualifier=None):
+def emit_case(ctx, stmt, fd, depth, qualifier=None):
     # Sub-statements for the case statement:
     #
     # anydata       0..n        
@@ -2066,27 +2059,20 @@ def emit_case(ctx, stmt, fd, indent, qualifier=None):
     # uses          0..n        
     # when          0..1        
 
+    indent = INDENTS[depth]
     # Add descriptive commentary 
-    fd.write(
-        "%s# The following properties are used in case of '%s'\n"
-        % (indent, stmt.arg)
-    )
+    commentary = f"{indent}# The following properties are used in case of '{stmt.arg}'\n"
     description = stmt.search_one('description')
     if description:
-        lines = wrap_text(description.arg)
-        for line in lines:
-            fd.write(
-                "%s  # %s\n"
-                % (indent, line)
-        )
+        commentary += format_comment(description, depth + 1)
+    fd.write(commentary)
     # Continue emitting properties
-    emit_properties(ctx, stmt, fd, indent, qualifier=qualifier)
+    emit_properties(ctx, stmt, fd, depth, qualifier=qualifier)
 
-    handled = ['leaf', 'leaf-list', 'list', 'container', 'choice', 'description' ]
-    check_substmts(stmt, handled)
+    check_substmts(stmt, HANDLED_CASE)
 
 
-def emit_type(ctx, stmt, fd, indent, qualifier=None):
+def emit_type(ctx, stmt, fd, depth, qualifier=None):
 
     # Sub-statements for the type statement:
     #
@@ -2101,73 +2087,44 @@ def emit_type(ctx, stmt, fd, indent, qualifier=None):
     # require-instance  0..1        
     # type              0..n        
 
-    try:
-        tosca_type = ctx.type_map[stmt.arg]
-    except KeyError:
-        # Not a built-in type. Use type name as is, but strip local
-        # prefix if necessary (since TOSCA doesn't have locally
-        # defined prefixes) and prepend tosca qualifier
-        tosca_type = create_qualified_name(ctx, stmt.arg, qualifier=qualifier)
+    indent = INDENTS[depth]
+    substmts = group_substmts(stmt)
+    tosca_type = get_tosca_type(ctx, stmt.arg, qualifier=qualifier)
 
     # We don't have a good way to handle YANG unions. For now, just
     # write out each of the types in the union and fix manually.
     if tosca_type == 'union':
-        fd.write("%s# The YANG type is a union. Select one of the following options:\n"
-                 % (indent))
-        types = stmt.search('type')
-        count = 1
-        for typedef in types:
-            fd.write("%s# Option %d\n"
-                     % (indent, count))
-            emit_type(ctx, typedef, fd, indent)
-            count = count+1
-        fd.write("%s#\n"
-                 % (indent))
+        fd.write(f"{indent}# The YANG type is a union. Select one of the following options:\n")
+        types = substmts['type']
+        for count, typedef in enumerate(types, 1):
+            fd.write(f"{indent}# Option {count}\n")
+            emit_type(ctx, typedef, fd, depth)
+        fd.write(f"{indent}#\n")
     else:
         # Regular type (not a union)
-        fd.write(
-            "%stype: %s\n"
-            % (indent, tosca_type)
-        )
+        fd.write(f"{indent}type: {tosca_type}\n")
         # For leafrefs, emit path for reference
-        path = stmt.search_one("path")
+        path = first_substmt(substmts, 'path')
         if path:
-            emit_path(ctx, path, fd, indent)
+            emit_commented_statement(ctx, path, fd, depth)
         # Emit commented fraction-digits
-        fraction_digits = stmt.search_one("fraction-digits")
+        fraction_digits = first_substmt(substmts, 'fraction-digits')
         if fraction_digits:
-            emit_fraction_digits(ctx, fraction_digits, fd, indent)
-        emit_constraints(ctx, stmt, fd, indent)
+            emit_commented_statement(ctx, fraction_digits, fd, depth)
+        emit_constraints(ctx, stmt, fd, depth, substmts)
 
-    handled = ['bit', 'enum', 'fraction-digits', 'length', 'range', 'pattern', 'path', 'type']
-    check_substmts(stmt, handled)
+    check_substmts(stmt, HANDLED_TYPE)
 
 
-def emit_presence(ctx, stmt, fd, indent):
-    fd.write(
-        "%s# presence: %s\n"
-        % (indent, stmt.arg)
-    )
+def emit_commented_statement(ctx, stmt, fd, depth):
+    """Emit a YANG statement that has no TOSCA equivalent (such as
+    presence, path, fraction-digits or unique) as a YAML comment.
+    """
+    indent = INDENTS[depth]
+    fd.write(f"{indent}# {stmt.keyword}: {stmt.arg}\n")
 
-def emit_path(ctx, stmt, fd, indent):
-    fd.write(
-        "%s# path: %s\n"
-        % (indent, stmt.arg)
-    )
-    
-def emit_fraction_digits(ctx, stmt, fd, indent):
-    fd.write(
-        "%s# fraction-digits: %s\n"
-        % (indent, stmt.arg)
-    )
-    
-def  emit_unique(ctx, stmt, fd, indent):
-    fd.write(
-        "%s# unique: %s\n"
-        % (indent, stmt.arg)
-    )
 
-def    emit_augment(ctx, stmt, fd, indent, prop=True):
+def    emit_augment(ctx, stmt, fd, depth, prop=True):
     # Sub-statements for the augment statement:
     #
     # action        0..n        
@@ -2187,37 +2144,40 @@ def    emit_augment(ctx, stmt, fd, indent, prop=True):
     # uses          0..n        
     # when          0..1        
 
+    indent = INDENTS[depth]
     # Find qualified type name for this augment
     type_name = stmt.arg
 
-    if ctx.opts.camel_case:
-        name = stringcase.camelcase(stmt.arg)
-    else:
-        name = stmt.arg
-    fd.write(
-        "%s%s:\n"
-        % (indent, name)
-    )
-    indent = indent + '  '
-    description = stmt.search_one('description')
+    name = get_property_name(ctx, stmt)
+    fd.write(f"{indent}{name}:\n")
+    depth = depth + 1
+    indent = INDENTS[depth]
+    substmts = group_substmts(stmt)
+    description = first_substmt(substmts, 'description')
     if description:
-        emit_description(ctx, description, fd, indent)
-    emit_metadata(ctx, stmt, fd, indent)
-    fd.write(
-        "%stype: %s\n"
-        % (indent, type_name)
-    )
-    must = stmt.search_one('must')
+        emit_description(ctx, description, fd, depth)
+    emit_metadata(ctx, stmt, fd, depth)
+    fd.write(f"{indent}type: {type_name}\n")
+    must = first_substmt(substmts, 'must')
     if must:
-        emit_must(ctx, must, fd, indent)
+        emit_must(ctx, must, fd, depth)
+
+    check_substmts(stmt, HANDLED_AUGMENT)
 
-    handled = ['reference', 'description', 
-               'container', 'list', 'uses',
-               'leaf', 'leaf-list', 'when', 'must']
-    check_substmts(stmt, handled)
 
+# Emitters for YANG statements that result in TOSCA property
+# definitions, indexed by keyword. Used by emit_property_definitions.
+PROPERTY_EMITTERS = {
+    'leaf': emit_leaf,
+    'leaf-list': emit_leaf_list,
+    'list': emit_list,
+    'container': emit_container,
+    'choice': emit_choice,
+    'augment': emit_augment,
+}
 
-def    emit_submodule(ctx, stmt, fd, indent):
+
+def    emit_submodule(ctx, stmt, fd, depth):
     # Sub-statements for the module statement:
     #
     # anydata       0..n        
@@ -2246,43 +2206,43 @@ def    emit_submodule(ctx, stmt, fd, indent):
     # typedef       0..n        
     # uses          0..n        
     # yang-version  1           
-    print('submodule')
+    logger.debug('submodule not handled')
 
-def    emit_include(ctx, stmt, fd, indent):
+def    emit_include(ctx, stmt, fd, depth):
 
     # Sub-statements for the includestatement:
     #
     # description    0..1        
     # reference      0..1        
     # revision-date  0..1        
-    print('include')
+    logger.debug('include not handled')
 
-def    emit_revision_date(ctx, stmt, fd, indent):
+def    emit_revision_date(ctx, stmt, fd, depth):
     # Sub-statements for the module statement:
     #
-    print('revision-date')
+    logger.debug('revision-date not handled')
 
-def    emit_extension(ctx, stmt, fd, indent):
+def    emit_extension(ctx, stmt, fd, depth):
     # Sub-statements for the extension statement:
     #
     # argument      0..1        
     # description   0..1        
     # reference     0..1        
     # status        0..1        
-    print('extension')
+    logger.debug('extension not handled')
 
-def    emit_argument(ctx, stmt, fd, indent):
+def    emit_argument(ctx, stmt, fd, depth):
     # Sub-statements for the argumement statement:
     #
     # yin-element   0..1        
-    print('argument')
+    logger.debug('argument not handled')
 
-def    emit_yin_element(ctx, stmt, fd, indent):
+def    emit_yin_element(ctx, stmt, fd, depth):
     # Sub-statements for the module statement:
     #
-    print('yin-element')
+    logger.debug('yin-element not handled')
 
-def    emit_identity(ctx, stmt, fd, indent):
+def    emit_identity(ctx, stmt, fd, depth):
     # Sub-statements for the identity statement:
     #
     # base          0..n        
@@ -2290,54 +2250,54 @@ def    emit_identity(ctx, stmt, fd, indent):
     # if-feature    0..n        
     # reference     0..1        
     # status        0..1        
-    print('identity')
+    logger.debug('identity not handled')
 
-def    emit_base(ctx, stmt, fd, indent):
+def    emit_base(ctx, stmt, fd, depth):
     # Sub-statements for the module statement:
     #
-    print('base')
+    logger.debug('base not handled')
 
-def    emit_require_instance(ctx, stmt, fd, indent):
+def    emit_require_instance(ctx, stmt, fd, depth):
     # Sub-statements for the module statement:
     #
-    print('require-instance')
+    logger.debug('require-instance not handled')
 
-def    emit_position(ctx, stmt, fd, indent):
+def    emit_position(ctx, stmt, fd, depth):
     # Sub-statements for the module statement:
     #
-    print('position')
+    logger.debug('position not handled')
 
-def    emit_status(ctx, stmt, fd, indent):
+def    emit_status(ctx, stmt, fd, depth):
     # Sub-statements for the module statement:
     #
-    print('status')
+    logger.debug('status not handled')
 
-def    emit_config(ctx, stmt, fd, indent):
+def    emit_config(ctx, stmt, fd, depth):
     # Sub-statements for the module statement:
     #
-    print('config')
+    logger.debug('config not handled')
 
-def    emit_error_message(ctx, stmt, fd, indent):
+def    emit_error_message(ctx, stmt, fd, depth):
     # Sub-statements for the module statement:
     #
-    print('error-message')
+    logger.debug('error-message not handled')
 
-def    emit_error_app_tag(ctx, stmt, fd, indent):
+def    emit_error_app_tag(ctx, stmt, fd, depth):
     # Sub-statements for the module statement:
     #
-    print('error-app-tag')
+    logger.debug('error-app-tag not handled')
 
-def    emit_value(ctx, stmt, fd, indent):
+def    emit_value(ctx, stmt, fd, depth):
     # Sub-statements for the module statement:
     #
-    print('value')
+    logger.debug('value not handled')
 
-def    emit_modifier(ctx, stmt, fd, indent):
+def    emit_modifier(ctx, stmt, fd, depth):
     # Sub-statements for the module statement:
     #
-    print('modifier')
+    logger.debug('modifier not handled')
 
-def    emit_anydata(ctx, stmt, fd, indent):
+def    emit_anydata(ctx, stmt, fd, depth):
     # Sub-statements for the anydata statement:
     #
     # config        0..1        
@@ -2348,9 +2308,9 @@ def    emit_anydata(ctx, stmt, fd, indent):
     # reference     0..1        
     # status        0..1        
     # when          0..1        
-    print('anydata')
+    logger.debug('anydata not handled')
 
-def    emit_anyxml(ctx, stmt, fd, indent):
+def    emit_anyxml(ctx, stmt, fd, depth):
     # Sub-statements for the anyxml statement:
     #
     # config        0..1        
@@ -2361,14 +2321,14 @@ def    emit_anyxml(ctx, stmt, fd, indent):
     # reference     0..1        
     # status        0..1        
     # when          0..1        
-    print('anyxml')
+    logger.debug('anyxml not handled')
 
-def    emit_refine(ctx, stmt, fd, indent):
+def    emit_refine(ctx, stmt, fd, depth):
     # Sub-statements for the module statement:
     #
-    print('refine')
+    logger.debug('refine not handled')
 
-def    emit_rpc(ctx, stmt, fd, indent):
+def    emit_rpc(ctx, stmt, fd, depth):
     # Sub-statements for the rpc statement:
     #
     # description   0..1        
@@ -2379,9 +2339,9 @@ def    emit_rpc(ctx, stmt, fd, indent):
     # reference     0..1        
     # status        0..1        
     # typedef       0..n        
-    print('rpc')
+    logger.debug('rpc not handled')
 
-def    emit_action(ctx, stmt, fd, indent):
+def    emit_action(ctx, stmt, fd, depth):
     # Sub-statements for the action statement:
     #
     # description   0..1        
@@ -2392,9 +2352,9 @@ def    emit_action(ctx, stmt, fd, indent):
     # reference     0..1        
     # status        0..1        
     # typedef       0..n        
-    print('action')
+    logger.debug('action not handled')
 
-def    emit_input(ctx, stmt, fd, indent):
+def    emit_input(ctx, stmt, fd, depth):
     # Sub-statements for the input statement:
     #
     # anydata       0..n        
@@ -2408,9 +2368,9 @@ def    emit_input(ctx, stmt, fd, indent):
     # must          0..n        
     # typedef       0..n        
     # uses          0..n        
-    print('input')
+    logger.debug('input not handled')
 
-def    emit_output(ctx, stmt, fd, indent):
+def    emit_output(ctx, stmt, fd, depth):
     # Sub-statements for the output statement:
     #
     # anydata       0..n        
@@ -2424,9 +2384,9 @@ def    emit_output(ctx, stmt, fd, indent):
     # must          0..n        
     # typedef       0..n        
     # uses          0..n        
-    print('output')
+    logger.debug('output not handled')
 
-def    emit_notification(ctx, stmt, fd, indent):
+def    emit_notification(ctx, stmt, fd, depth):
     # Sub-statements for the notification statement:
     #
     # anydata       0..n        
@@ -2444,17 +2404,17 @@ def    emit_notification(ctx, stmt, fd, indent):
     # status        0..1        
     # typedef       0..n        
     # uses          0..n        
-    print('notification')
+    logger.debug('notification not handled')
 
-def    emit_deviation(ctx, stmt, fd, indent):
+def    emit_deviation(ctx, stmt, fd, depth):
     # Sub-statements for the deviation statement:
     #
     # description   0..1        
     # deviate       1..n        
     # reference     0..1        
-    print('deviation')
+    logger.debug('deviation not handled')
 
-def    emit_deviate(ctx, stmt, fd, indent):
+def    emit_deviate(ctx, stmt, fd, depth):
     # Sub-statements for the deviate statement:
     #
     # config        0..1        
@@ -2466,29 +2426,57 @@ def    emit_deviate(ctx, stmt, fd, indent):
     # type          0..1        
     # unique        0..n        
     # units         0..1        
-    print('deviate')
+    logger.debug('deviate not handled')
+
+# Group the substatements of a statement by keyword. This allows
+# emitters to find all the substatements they need in a single pass
+# rather than scanning the list of substatements for each keyword.
+def group_substmts(stmt):
+    substmts = defaultdict(list)
+    for sub in stmt.substmts:
+        substmts[sub.keyword].append(sub)
+    return substmts
+
+
+# Return the first substatement with the specified keyword from a set
+# of grouped substatements, or None if there is no such substatement.
+def first_substmt(substmts, keyword):
+    subs = substmts.get(keyword)
+    return subs[0] if subs else None
+
 
 # Debugging support: print unhandled substatements for a given
 # statement.
 def check_substmts(stmt, handled):
-    for sub in stmt.substmts:
-        if not sub.keyword in handled:
-            if stmt.keyword in  ['module', 'submodule']:
-                warning = "/: %s(%s) not handled" % (
-                    sub.keyword, sub.arg
-                )
-            else:
-                warning = "%s: %s(%s) not handled" % (
-                    statements.mk_path_str(stmt, True), sub.keyword, sub.arg
-                )
-            print(warning)
+    unhandled = [sub for sub in stmt.substmts if sub.keyword not in handled]
+    if not unhandled:
+        return
+
+    # Build the path once and report all unhandled sub-statements
+    # with a single write.
+    if stmt.keyword in ('module', 'submodule'):
+        path = "/"
+    else:
+        path = statements.mk_path_str(stmt, True)
+    print("\n".join([
+        f"{path}: {sub.keyword}({sub.arg}) not handled" for sub in unhandled
+    ]))
 
 
 # Debugging support: print a YANG statement            
 def print_statement(stmt):
-    for key in dir(stmt):
+    # pyang statements keep their standard attributes in __slots__ and
+    # anything added later (such as our i_tosca_* caches) in
+    # __dict__. Only look at those rather than everything dir()
+    # returns, which includes all methods.
+    keys = set(vars(stmt))
+    for cls in type(stmt).__mro__:
+        keys.update(getattr(cls, '__slots__', ()))
+    keys.discard('__dict__')
+    for key in sorted(keys):
         try:
-            print(key + " = " + str(getattr(stmt, key)))
+            print(f"{key} = {getattr(stmt, key)}")
         except AttributeError:
+            # Slot that has not been set
             pass
         